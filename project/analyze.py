@@ -1,7 +1,11 @@
 from itertools import permutations
-from django.db.models import Max, Min, Avg, StdDev, Sum, Count
+from django.db import connection
+from django.db.models import Max, Min, Avg, StdDev, Sum, Count, F, Window
+from django.db.models import IntegerField
+from django.db.models.expressions import ExpressionList
+from django.db.models.functions import RowNumber
 from . import models
-from .queryset import Median
+from .queryset import Percentile
 
 
 REQUEST_DOMAINS = [
@@ -23,28 +27,116 @@ ORDER_DOMAINS = [
 DETAIL_DOMAINS = ["task__text", "resource__text", "resource__type__text"]
 
 
-def analyze(queryset, domain, range):
-    r = range
-    annotation_dicts = [
-        {
-            f"{r}_avg": Avg(r),
-            f"{r}_stddev": StdDev(r),
-            f"{r}_sum": Sum(r),
-            f"{r}_median": Median(r),
-        }
-    ]
+AGGREGATES = {"avg": Avg, "count": Count, "stddev": StdDev, "sum": Sum}
+
+# The statistics computed when none is asked for.
+STATS = ["avg", "stddev", "sum", "median"]
+
+
+def percentile_of(stat):
+    """
+    The fraction of a percentile statistic, 0.5 for "median" and 0.9 for
+    "p90", or None for any other statistic.
+    """
+    if stat == "median":
+        return 0.5
+    if stat.startswith("p") and stat[1:].isdigit() and 0 < int(stat[1:]) < 100:
+        return int(stat[1:]) / 100
+    return None
+
+
+def aggregate(stat, field):
+    percentile = percentile_of(stat)
+    if percentile is not None:
+        return Percentile(field, percentile)
+    if stat not in AGGREGATES:
+        raise ValueError(f"Unknown statistic {stat!r}")
+    return AGGREGATES[stat](field)
+
+
+def as_list(value):
+    return [value] if isinstance(value, str) else list(value)
 
-    annotations = {}
-    for d in annotation_dicts:
-        annotations.update(d)
+
+def analyze(queryset, domain, range, stats=None):
+    """
+    Group ``queryset`` by ``domain`` and annotate each group with every
+    requested statistic of every ``range`` column, named ``{range}_{stat}``,
+    in a single query. ``domain``, ``range`` and ``stats`` may each be one
+    name or a list of them; ``stats`` defaults to ``STATS``.
+    """
+    domains = as_list(domain)
+    annotations = {
+        f"{r}_{s}": aggregate(s, r)
+        for r in as_list(range)
+        for s in as_list(stats or STATS)
+    }
     return (
-        queryset.filter(**{f"{domain}__isnull": False})
-        .values(domain)
+        queryset.filter(**{f"{d}__isnull": False for d in domains})
+        .values(*domains)
         .distinct()
         .annotate(**annotations)
     )
 
 
+def ordering(field):
+    if not isinstance(field, str):
+        return field
+    if field.startswith("-"):
+        return F(field[1:]).desc()
+    return F(field).asc()
+
+
+def top_n_per_group(queryset, partition_by, order_by, n):
+    """
+    The first ``n`` rows of ``queryset`` within each group of
+    ``partition_by`` when ordered by ``order_by``, as dicts ordered by group
+    and rank. ``partition_by`` and ``order_by`` take field names, "-" for
+    descending, or expressions, either one or a list of them. Each row gets
+    its group as ``group_0``, ``group_1``, ... and its ``rank``.
+
+    This is a single ``ROW_NUMBER() OVER (PARTITION BY ...)`` query, wrapped
+    so the rank can be filtered, since Django can't filter on a window.
+    """
+    if not isinstance(partition_by, (list, tuple)):
+        partition_by = [partition_by]
+    if not isinstance(order_by, (list, tuple)):
+        order_by = [order_by]
+    groups = {
+        f"group_{i}": F(p) if isinstance(p, str) else p
+        for i, p in enumerate(partition_by)
+    }
+    if queryset._fields is None:
+        queryset = queryset.values()
+    ranked = queryset.annotate(**groups).annotate(
+        rank=Window(
+            RowNumber(),
+            partition_by=[F(name) for name in groups],
+            # An explicit output field stops SQLite from wrapping the whole
+            # ORDER BY list in a CAST when it orders by a decimal.
+            order_by=ExpressionList(
+                *[ordering(o) for o in order_by], output_field=IntegerField()
+            ),
+        )
+    )
+    compiler = ranked.query.get_compiler(ranked.db)
+    sql, params = compiler.as_sql()
+    query = ranked.query
+    names = [*query.extra_select, *query.values_select, *query.annotation_select]
+    qn = connection.ops.quote_name
+    columns = ", ".join(qn(name) for name in [*groups, "rank"])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT * FROM ({sql}) ranked WHERE {qn('rank')} <= %s "
+            f"ORDER BY {columns}",
+            params + (n,),
+        )
+        rows = cursor.fetchall()
+    converters = compiler.get_converters([s[0] for s in compiler.select])
+    rows = compiler.apply_converters(rows, converters)
+    return [dict(zip(names, row)) for row in rows]
+
+
 def x():
     orders = models.WorkOrder.objects.all()
     perms = permutations(ORDER_DOMAINS)
@@ -54,6 +146,7 @@ def x():
                 orders,
                 ORDER_DOMAINS,
                 ["total_cost", "labor_cost", "material_cost", "equipment_cost"],
+                stats=["count"],
             ).order_by("-total_cost_count")[:10]
         ),
         list(
@@ -61,6 +154,7 @@ def x():
                 orders,
                 ORDER_DOMAINS,
                 ["total_cost", "labor_cost", "material_cost", "equipment_cost"],
+                stats=["sum"],
             ).order_by("-total_cost_sum")[:10]
         ),
     ]
@@ -1,10 +1,22 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+ANALYTICS_ENGINES = ["cube", "numpy", "sql"]
 
 
 class ProjectConfig(AppConfig):
     name = "project"
 
     def ready(self):
-        # To avoid putting the signals code in the __init__.py file or
-        # models.py file, we import the signals module here.
-        pass
+        # Reject an unknown ANALYTICS_ENGINE, or the numpy engine without
+        # numpy installed, at startup rather than on the first chart request.
+        engine = getattr(settings, "ANALYTICS_ENGINE", "cube")
+        if engine not in ANALYTICS_ENGINES:
+            raise ImproperlyConfigured(
+                f"ANALYTICS_ENGINE must be one of {', '.join(ANALYTICS_ENGINES)}."
+            )
+        if engine == "numpy":
+            from . import columnar
+
+            columnar.check()
@@ -0,0 +1,115 @@
+"""
+Bulk inserts for the loaders.
+
+On Postgres rows are streamed into the table with ``COPY ... FROM STDIN``:
+they are serialized into an in-memory buffer in COPY's text format, which
+is flushed every ``chunk_size`` rows so memory stays bounded however many
+rows are written. Other databases, such as SQLite in development, fall back
+to ``executemany`` for raw rows and ``bulk_create`` for model instances.
+
+COPY doesn't return the ids it assigned and can't skip conflicting rows, so
+it suits tables the loaders only append to. Rows that may already exist,
+like addresses and assets, are still created with ``ignore_conflicts``.
+"""
+
+import io
+
+from django.db import connection
+
+from .reader import chunked
+
+CHUNK_SIZE = 10000
+
+
+def copy_value(value):
+    if value is None:
+        return "\\N"
+    if not isinstance(value, str):
+        value = value.isoformat() if hasattr(value, "isoformat") else str(value)
+    return (
+        value.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+class CopyWriter:
+    """
+    Buffers rows in COPY's text format and copies them into ``table`` every
+    ``chunk_size`` rows, and once more on ``flush``.
+    """
+
+    def __init__(self, cursor, table, columns, chunk_size=CHUNK_SIZE):
+        qn = connection.ops.quote_name
+        self.cursor = cursor
+        self.sql = "COPY {} ({}) FROM STDIN".format(
+            qn(table), ", ".join(qn(c) for c in columns)
+        )
+        self.chunk_size = chunk_size
+        self.buffer = io.StringIO()
+        self.pending = 0
+        self.count = 0
+
+    def write(self, row):
+        self.buffer.write("\t".join(copy_value(v) for v in row))
+        self.buffer.write("\n")
+        self.pending += 1
+        if self.pending >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        self.buffer.seek(0)
+        self.cursor.copy_expert(self.sql, self.buffer)
+        self.count += self.pending
+        self.buffer = io.StringIO()
+        self.pending = 0
+
+
+def copy_rows(cursor, table, columns, rows, chunk_size=CHUNK_SIZE):
+    """
+    Insert ``rows``, sequences of values in the order of ``columns``, into
+    ``table`` and return how many were written.
+    """
+    if connection.vendor == "postgresql":
+        writer = CopyWriter(cursor, table, columns, chunk_size)
+        for row in rows:
+            writer.write(row)
+        writer.flush()
+        return writer.count
+    qn = connection.ops.quote_name
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        qn(table),
+        ", ".join(qn(c) for c in columns),
+        ", ".join(["%s"] * len(columns)),
+    )
+    count = 0
+    for chunk in chunked(rows, chunk_size):
+        cursor.executemany(sql, chunk)
+        count += len(chunk)
+    return count
+
+
+def insert(model, objects, chunk_size=CHUNK_SIZE):
+    """
+    Insert new ``model`` instances and return how many were written. Unlike
+    ``bulk_create`` the instances don't get their ids.
+    """
+    if connection.vendor != "postgresql":
+        objects = list(objects)
+        model.objects.bulk_create(objects, batch_size=chunk_size)
+        return len(objects)
+    fields = [f for f in model._meta.concrete_fields if f is not model._meta.auto_field]
+    rows = (
+        [
+            field.get_db_prep_save(field.pre_save(obj, True), connection)
+            for field in fields
+        ]
+        for obj in objects
+    )
+    with connection.cursor() as cursor:
+        return copy_rows(
+            cursor, model._meta.db_table, [f.column for f in fields], rows, chunk_size
+        )
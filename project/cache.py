@@ -0,0 +1,105 @@
+"""
+Response cache for the dashboard's JSON endpoints.
+
+Responses are stored serialized in the "chart" cache, keyed on the view,
+the normalized query parameters and the import generation. Every import
+bumps the generation in the database, so the entries of earlier imports are
+never read again and age out of the cache. Each process re-reads the
+generation at most every ``CHART_CACHE_GENERATION_TTL`` seconds, which keeps
+the database out of the path of a cache hit.
+
+Hit and miss counters are kept per process.
+"""
+
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.http import HttpResponse
+
+from . import models
+
+CACHE_ALIAS = "chart"
+GENERATION = "imports"
+
+stats = {"hits": 0, "misses": 0}
+
+_generation = {"value": None, "expires": 0.0}
+
+
+def current_generation():
+    now = time.monotonic()
+    if _generation["value"] is None or now >= _generation["expires"]:
+        value = (
+            models.CacheGeneration.objects.filter(name=GENERATION)
+            .values_list("value", flat=True)
+            .first()
+        )
+        _generation["value"] = value or 0
+        _generation["expires"] = now + settings.CHART_CACHE_GENERATION_TTL
+    return _generation["value"]
+
+
+def bump_generation():
+    models.CacheGeneration.objects.get_or_create(name=GENERATION)
+    models.CacheGeneration.objects.filter(name=GENERATION).update(value=F("value") + 1)
+    _generation["value"] = None
+
+
+def cached_value(name, build):
+    """
+    The result of ``build()`` for the current import generation, built on
+    the first call after each import.
+    """
+    cache = caches[CACHE_ALIAS]
+    key = f"{name}:{current_generation()}"
+    value = cache.get(key)
+    if value is None:
+        stats["misses"] += 1
+        value = build()
+        cache.set(key, value)
+    else:
+        stats["hits"] += 1
+    return value
+
+
+def normalize_params(params):
+    # Blank filters are the same as missing ones, and the order of the
+    # parameters doesn't matter.
+    return sorted(
+        (key, value.strip()) for key, value in params.items() if value.strip()
+    )
+
+
+def cache_key(name, params):
+    normalized = "&".join(f"{k}={v}" for k, v in normalize_params(params))
+    digest = hashlib.md5(normalized.encode()).hexdigest()
+    return f"{name}:{current_generation()}:{digest}"
+
+
+def cached_json(view):
+    """
+    Cache the successful responses of a JSON view on its GET parameters.
+    """
+
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        cache = caches[CACHE_ALIAS]
+        key = cache_key(view.__name__, request.GET)
+        content = cache.get(key)
+        if content is not None:
+            stats["hits"] += 1
+            response = HttpResponse(content, content_type="application/json")
+            response["X-Cache"] = "HIT"
+            return response
+        stats["misses"] += 1
+        response = view(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.content)
+        response["X-Cache"] = "MISS"
+        return response
+
+    return wrapper
@@ -1,10 +1,22 @@
-import csv
-from datetime import datetime
-from django.db.models import Count
-import pytz
-from . import models
-
-TZ = pytz.timezone("America/Chicago")
+from collections import namedtuple
+from datetime import date
+from django.db import connection, transaction
+from . import (
+    bulk,
+    cache,
+    cube,
+    facts,
+    models,
+    productivity,
+    profiling,
+    reader,
+    rollup,
+)
+from .dates import parse_date, parse_datetime
+
+BATCH_SIZE = 500
+# bulk_update emits a CASE per field, which gets slow with large batches.
+UPDATE_BATCH_SIZE = 100
 
 REQUEST_ATTRIBUTES = [
     ("Status", "Status Text", models.WorkRequestStatus, "status"),
@@ -41,58 +53,170 @@ DETAIL_ATTRIBUTES = [
 ]
 
 
+# Collapse the rows sharing a code into the oldest one, which keeps the
+# longest text of the group.
+DEDUPE_SQL = """
+CREATE TEMPORARY TABLE {dedupe} AS
+SELECT id, survivor, longest_text FROM (
+    SELECT
+        id,
+        FIRST_VALUE(id) OVER (PARTITION BY code ORDER BY id) AS survivor,
+        FIRST_VALUE({text}) OVER (
+            PARTITION BY code ORDER BY LENGTH({text}) DESC, id
+        ) AS longest_text,
+        COUNT(*) OVER (PARTITION BY code) AS copies
+    FROM {table}
+) ranked
+WHERE copies > 1
+"""
+
+DEDUPE_SURVIVOR_SQL = """
+UPDATE {table} SET {text} = (
+    SELECT d.longest_text FROM {dedupe} d WHERE d.id = {table}.id
+)
+WHERE id IN (SELECT survivor FROM {dedupe})
+"""
+
+DEDUPE_REFERENCES_SQL = """
+UPDATE {related_table} SET {column} = (
+    SELECT d.survivor FROM {dedupe} d WHERE d.id = {related_table}.{column}
+)
+WHERE {column} IN (SELECT id FROM {dedupe} WHERE id <> survivor)
+"""
+
+DEDUPE_DELETE_SQL = """
+DELETE FROM {table} WHERE id IN (SELECT id FROM {dedupe} WHERE id <> survivor)
+"""
+
+
+def dedupe_attribute_model(cursor, model):
+    qn = connection.ops.quote_name
+    params = {
+        "table": qn(model._meta.db_table),
+        "text": qn("text"),
+        "dedupe": qn("project_attribute_dedupe"),
+    }
+    cursor.execute("DROP TABLE IF EXISTS {dedupe}".format(**params))
+    cursor.execute(DEDUPE_SQL.format(**params))
+    cursor.execute(DEDUPE_SURVIVOR_SQL.format(**params))
+    for rel in model._meta.related_objects:
+        cursor.execute(
+            DEDUPE_REFERENCES_SQL.format(
+                related_table=qn(rel.related_model._meta.db_table),
+                column=qn(rel.field.column),
+                **params,
+            )
+        )
+    cursor.execute(DEDUPE_DELETE_SQL.format(**params))
+    cursor.execute("DROP TABLE {dedupe}".format(**params))
+
+
 def clean_attribute_duplicates():
-    models = (
+    models = dict.fromkeys(
         [a[2] for a in REQUEST_ATTRIBUTES]
         + [a[2] for a in ORDER_ATTRIBUTES]
         + [a[2] for a in DETAIL_ATTRIBUTES]
     )
-    for m in models:
-        for code in (
-            m.objects.values("code")
-            .annotate(count=Count("code"))
-            .filter(count__gt=1)
-            .values_list("code", flat=True)
-        ):
-            value = ""
-            for text in m.objects.filter(code=code).values_list("text", flat=True):
-                if len(text) > len(value):
-                    value = text
-            final = m.objects.filter(code=code).first()
-            final.text = value
-            final.save()
-            m.objects.filter(code=code).exclude(id=final.id).delete()
-        m.objects.filter(code="").delete()
-        m.objects.filter(code=" ").delete()
-
-
-def clean_attribute(dict_reader, code_field, text_field):
-    results = set()
-    try:
-        for row in dict_reader:
-            if not row[code_field]:
+    with transaction.atomic(), connection.cursor() as cursor:
+        for m in models:
+            dedupe_attribute_model(cursor, m)
+            m.objects.filter(code__in=["", " "]).delete()
+        # The summaries refer to attributes by id.
+        refresh_summaries()
+    finish_import()
+
+
+def finish_import():
+    cache.bump_generation()
+    # Build the dashboard options for the new generation up front.
+    facts.options()
+
+
+def summary_scope(codes, previous=None):
+    """
+    The (partitions, crews, projects) of the summaries holding the work
+    orders of the given projects, joined with a ``previous`` scope.
+    """
+    partitions = cube.affected_partitions(codes)
+    crews = productivity.affected_crews(codes)
+    projects = set(codes)
+    if previous is not None:
+        partitions |= previous[0]
+        crews |= previous[1]
+        projects |= previous[2]
+    return partitions, crews, projects
+
+
+def refresh_summaries(scope=None):
+    """
+    Rebuild the work order summaries within a scope from ``summary_scope``,
+    or entirely when no scope is given.
+    """
+    partitions, crews, projects = scope or (None, None, None)
+    cube.refresh_cube(partitions)
+    rollup.refresh_rollups(partitions)
+    productivity.refresh_crew_months(crews)
+    facts.refresh_facts(projects)
+
+
+def sync_summary_texts():
+    # Any loader can change the text of an attribute the summaries copy.
+    facts.sync_fact_texts()
+    facts.sync_texts(models.CrewMonth, ["crew"])
+
+
+def attribute_columns(attributes):
+    return [
+        column
+        for attr_code, attr_text, _, _ in attributes
+        for column in (attr_code, attr_text)
+    ]
+
+
+def extract_attributes(rows, attributes):
+    # Collect the longest text for every code of every attribute model in a
+    # single pass over the file.
+    columns, results = None, {}
+    for row in rows:
+        if columns is None:
+            columns = [
+                (attr_code, attr_text, model)
+                for attr_code, attr_text, model, _ in attributes
+                if attr_code in row and attr_text in row
+            ]
+            results = {model: {} for _, _, model in columns}
+        for attr_code, attr_text, model in columns:
+            code = row[attr_code]
+            if not code:
                 continue
-            results.add((row[code_field], row[text_field]))
-    except KeyError:
-        return None
+            text = row[attr_text]
+            texts = results[model]
+            if code not in texts or len(text) > len(texts[code]):
+                texts[code] = text
     return results
 
 
+def save_attributes(model, texts):
+    existing = {
+        code: (pk, text)
+        for code, pk, text in model.objects.filter(code__in=texts).values_list(
+            "code", "id", "text"
+        )
+    }
+    created, updated = [], []
+    for code, text in texts.items():
+        if code not in existing:
+            created.append(model(code=code, text=text))
+        elif len(existing[code][1]) < len(text):
+            updated.append(model(id=existing[code][0], code=code, text=text))
+    model.objects.bulk_create(created)
+    model.objects.bulk_update(updated, ["text"], batch_size=UPDATE_BATCH_SIZE)
+
+
 def populate_attribute_models(filepath, attributes):
-    with open(filepath, mode="r") as f:
-        dict_reader = csv.DictReader(f)
-        for attr_code, attr_text, model, _ in attributes:
-            f.seek(1)
-            data = clean_attribute(dict_reader, attr_code, attr_text)
-            if not data:
-                continue
-            for code, text in data:
-                instance = model.objects.filter(code=code).first()
-                if not instance:
-                    model.objects.create(code=code, text=text)
-                elif len(instance.text) < len(text):
-                    instance.text = text
-                    instance.save()
+    rows = reader.read_rows(filepath, attribute_columns(attributes))
+    for model, texts in extract_attributes(rows, attributes).items():
+        save_attributes(model, texts)
 
 
 ADDRESS_MAP = {
@@ -106,8 +230,14 @@ ADDRESS_MAP = {
     "Other Location Information": "other",
 }
 
+ADDRESS_COLUMNS = list(ADDRESS_MAP) + [
+    "Street 2 Direction",
+    "Street 2 Name",
+    "Street 2 Type",
+]
+
 
-def parse_address(row):
+def address_attributes(row):
     attributes = {
         "other": row.get("Other Location Information") == "True",
         "street2": " ".join(
@@ -125,161 +255,646 @@ def parse_address(row):
     }
     for csv_key, model_key in ADDRESS_MAP.items():
         attributes[model_key] = row.get(csv_key) or ""
-    address = models.Address.objects.filter(**attributes).first()
-    if not address:
-        address = models.Address.objects.create(**attributes)
-    return address
-
-
-def parse_project(row, field):
-    code = row[field]
-    project, _ = models.Project.objects.get_or_create(code=code)
-    return project
-
-
-def parse_datetime(date_str, time_str):
-    try:
-        d = datetime.strptime(date_str, "%m/%d/%Y %H:%M:%S")
-    except ValueError:
-        d = datetime.strptime(date_str, "%m/%d/%Y %H:%M")
-    try:
-        t = datetime.strptime(time_str, "%m/%d/%Y %H:%M:%S")
-    except ValueError:
-        t = datetime.strptime(time_str, "%m/%d/%Y %H:%M")
-    return TZ.localize(datetime.combine(d.date(), t.time()))
-
-
-def parse_date(date_str):
-    if not date_str:
-        return None
-    try:
-        d = datetime.strptime(date_str, "%m/%d/%Y %H:%M:%S").date()
-    except ValueError:
-        try:
-            d = datetime.strptime(date_str, "%m/%d/%Y %H:%M").date()
-        except ValueError:
-            d = datetime.strptime(date_str, "%m/%d/%Y").date()
-    return d
-
-
-def process_requests():
-    populate_attribute_models("data/work_request.csv", REQUEST_ATTRIBUTES)
-    with open("data/work_request.csv", mode="r") as f:
-        dict_reader = csv.DictReader(f)
-        for r in dict_reader:
-            address = parse_address(r)
-            project = parse_project(r, "Requisition Number")
-            attributes = {
-                "received": parse_datetime(r["Received Date"], r["Received Time"]),
-                "priority": r.get("priority") and int(r["priority"]),
-                "updated": parse_date(r["Status Date"]),
-                "projected_start": parse_date(r["Projected Start Date"]),
-                "after_hours": r["After Hours"] == "TRUE",
-                "callback_requested": r.get("Call Back Requested")
-                and r["Call Back Requested"] == "TRUE",
-                "address": address,
-                "related_asset": r["Related Asset Type"],
-            }
-            for key, _, model, model_field in REQUEST_ATTRIBUTES:
-                attributes[model_field] = model.objects.filter(code=r[key]).first()
-            models.WorkRequest.objects.update_or_create(
-                project=project, defaults=attributes
+    return attributes
+
+
+class AddressRegistry:
+    """
+    Intern table of address key to Address id for the duration of an
+    import. Unknown addresses are looked up and created in bulk, relying on
+    the unique key to resolve races with concurrent imports.
+    """
+
+    def __init__(self):
+        self.ids = {}
+
+    def resolve(self, attributes):
+        attributes = list(attributes)
+        keys = [models.address_key(a) for a in attributes]
+        missing = {k: a for k, a in zip(keys, attributes) if k not in self.ids}
+        if missing:
+            self.ids.update(
+                models.Address.objects.filter(key__in=missing).values_list("key", "id")
+            )
+            new = [
+                models.Address(key=k, **a)
+                for k, a in missing.items()
+                if k not in self.ids
+            ]
+            if new:
+                models.Address.objects.bulk_create(new, ignore_conflicts=True)
+                self.ids.update(
+                    models.Address.objects.filter(
+                        key__in=[a.key for a in new]
+                    ).values_list("key", "id")
+                )
+        return [self.ids[k] for k in keys]
+
+
+class AssetRegistry:
+    """
+    Intern table of (code, desc1, desc2) to Asset id for the duration of an
+    import. Like addresses, unknown assets are created in bulk and conflicts
+    on the natural key are left to the database.
+    """
+
+    def __init__(self):
+        self.ids = {}
+
+    def fetch(self, keys):
+        for chunk in chunked(keys):
+            self.ids.update(
+                (values[1:], values[0])
+                for values in models.Asset.objects.filter(
+                    code__in={code for code, _, _ in chunk}
+                ).values_list("id", "code", "desc1", "desc2")
             )
 
-
-def parse_asset(row):
-    return models.Asset.objects.get_or_create(
-        code=row["Asset"] or "", desc1=row["Desc 1"] or "", desc2=row["Desc 2"] or ""
-    )[0]
-
-
-def parse_facility(row):
-    value = row["Facility Location"]
-    if not value:
-        return None
-    try:
-        return models.Facility.objects.get(text=value)
-    except models.Facility.DoesNotExist:
-        return models.Facility.objects.create(code=value, text=value)
-
-
-def process_orders():
-    populate_attribute_models("data/work_order_summary.csv", ORDER_ATTRIBUTES)
-    with open("data/work_order_summary.csv", mode="r") as f:
-        dict_reader = csv.DictReader(f)
-        for r in dict_reader:
-            address = parse_address(r)
-            project = parse_project(r, "Work Order Number")
-            attributes = {
-                "created": parse_date(r["Creation Date"]),
-                "priority": (r.get("priority") or None) and int(r["priority"]),
-                "updated": parse_date(r["Status Date"]),
-                "total_cost": r["Total Cost"],
-                "quantity": r["Quantity"],
-                "labor_hours": r["Actual Labor Hours"],
-                "labor_cost": r["Actual Labor Cost"],
-                "equipment_cost": r["Actual Equip Cost"],
-                "material_cost": r["Actual Material Cost"],
-                "contractor_cost": r["Contractor Cost"],
-                "misc_cost": r["Misc. Cost"],
-                "duration": r["Duration Actual(Hrs)"],
-                "billing_required": r["Billing Required"] == "TRUE",
-                "supervisor": r["Supervisor"] or None,
-                "lead_worker": r["LeadWorker Id"] or None,
-                "project_number": r["Project Number"],
-                "address": address,
-                "facility": parse_facility(r),
-                "asset": parse_asset(r),
-            }
-            for key, _, model, model_field in ORDER_ATTRIBUTES:
-                attributes[model_field] = model.objects.filter(code=r[key]).first()
-            models.WorkOrder.objects.update_or_create(
-                project=project, defaults=attributes
+    def resolve(self, keys):
+        keys = list(keys)
+        missing = set(keys) - self.ids.keys()
+        if missing:
+            self.fetch(missing)
+            new = missing - self.ids.keys()
+            if new:
+                models.Asset.objects.bulk_create(
+                    [
+                        models.Asset(code=code, desc1=desc1, desc2=desc2)
+                        for code, desc1, desc2 in new
+                    ],
+                    batch_size=BATCH_SIZE,
+                    ignore_conflicts=True,
+                )
+                self.fetch(new)
+        return [self.ids[key] for key in keys]
+
+
+class ProjectRegistry:
+    """
+    Intern table of project code to Project id shared by the loaders of an
+    import run. The known projects are read in one query on first use and
+    unknown codes are created in bulk, relying on the unique code to resolve
+    races with concurrent imports. ``ids`` seeds the table, e.g. for a
+    worker process writing projects its parent already resolved.
+    """
+
+    def __init__(self, ids=None):
+        self.ids = ids
+
+    def resolve(self, codes):
+        """The ids of ``codes`` by code, creating the missing projects."""
+        if self.ids is None:
+            self.ids = dict(models.Project.objects.values_list("code", "id"))
+        codes = set(codes)
+        missing = codes - self.ids.keys()
+        if missing:
+            models.Project.objects.bulk_create(
+                [models.Project(code=code) for code in missing],
+                batch_size=BATCH_SIZE,
+                ignore_conflicts=True,
             )
+            for chunk in chunked(missing):
+                self.ids.update(
+                    models.Project.objects.filter(code__in=chunk).values_list(
+                        "code", "id"
+                    )
+                )
+        return {code: self.ids[code] for code in codes}
+
+
+class ImportLookups:
+    """
+    The dimension rows a loader resolves codes against, loaded once and
+    shared by every chunk of the import.
+    """
+
+    def __init__(self, attributes, projects=None):
+        self.attributes = attribute_maps(attributes)
+        self.projects = ProjectRegistry() if projects is None else projects
+        self.addresses = AddressRegistry()
+        self.assets = AssetRegistry()
+        self.facilities = None
+
+    def asset_ids(self, keys):
+        return self.assets.resolve(keys)
+
+    def facility_ids(self, texts):
+        if self.facilities is None:
+            self.facilities = dict(models.Facility.objects.values_list("text", "id"))
+        ids = []
+        for text in texts:
+            if not text:
+                ids.append(None)
+                continue
+            if text not in self.facilities:
+                self.facilities[text] = models.Facility.objects.create(
+                    code=text, text=text
+                ).id
+            ids.append(self.facilities[text])
+        return ids
+
+
+def chunked(iterable, size=BATCH_SIZE):
+    return reader.chunked(iterable, size)
+
+
+def attribute_maps(attributes):
+    return {
+        model: dict(model.objects.values_list("code", "id"))
+        for _, _, model, _ in attributes
+    }
+
 
+def attribute_ids(record, attributes, lookups):
+    return {
+        f"{model_field}_id": lookups.attributes[model].get(record["codes"][key])
+        for key, _, model, model_field in attributes
+        if model_field
+    }
+
+
+# The loaders are split into a normalize step, which turns a CSV row into
+# plain python values without touching the database, and a write step, which
+# resolves codes against the lookups and saves a chunk of records. This lets
+# project.importer parse the files in worker processes.
+
+
+REQUEST_COLUMNS = (
+    [
+        "Requisition Number",
+        "Received Date",
+        "Received Time",
+        "priority",
+        "Status Date",
+        "Projected Start Date",
+        "After Hours",
+        "Call Back Requested",
+        "Related Asset Type",
+    ]
+    + ADDRESS_COLUMNS
+    + attribute_columns(REQUEST_ATTRIBUTES)
+)
+
+
+WORK_REQUEST_FIELDS = [
+    "received",
+    "priority",
+    "status",
+    "updated",
+    "category",
+    "problem",
+    "department",
+    "division",
+    "after_hours",
+    "callback_requested",
+    "projected_start",
+    "facility",
+    "location",
+    "address",
+    "related_asset",
+]
 
-def parse_resource(row):
-    if not row["Resource"]:
-        return None
-    type = models.ResourceType.objects.get(code=row["Resource Type"])
-    resource, _ = models.Resource.objects.get_or_create(
-        code=row["Resource"],
-        type=type,
-        defaults={
-            "default_unit_cost": row["Default Unit Cost"],
-            "text": row["Resource Text"],
+
+def normalize_request(r):
+    return {
+        "project": r["Requisition Number"],
+        "address": address_attributes(r),
+        "codes": {key: r[key] for key, _, _, _ in REQUEST_ATTRIBUTES},
+        "values": {
+            "received": parse_datetime(r["Received Date"], r["Received Time"]),
+            "priority": r.get("priority") and int(r["priority"]),
+            "updated": parse_date(r["Status Date"]),
+            "projected_start": parse_date(r["Projected Start Date"]),
+            "after_hours": r["After Hours"] == "TRUE",
+            "callback_requested": r.get("Call Back Requested")
+            and r["Call Back Requested"] == "TRUE",
+            "related_asset": r["Related Asset Type"],
         },
+    }
+
+
+def save_by_project(model, objects, fields):
+    """
+    Save ``objects``, a dict of project id to unsaved instance, inserting the
+    projects' new rows and updating only the rows whose ``fields`` changed.
+    """
+    fields = [model._meta.get_field(name) for name in fields]
+    existing = {
+        values[0]: values[1:]
+        for values in model.objects.filter(project_id__in=objects).values_list(
+            "project_id", "id", *[field.attname for field in fields]
+        )
+    }
+    created, updated = [], []
+    for project_id, obj in objects.items():
+        current = existing.get(project_id)
+        if current is None:
+            created.append(obj)
+            continue
+        obj.id = current[0]
+        values = tuple(field.to_python(getattr(obj, field.attname)) for field in fields)
+        if values != current[1:]:
+            updated.append(obj)
+    with profiling.stage("save", len(objects)):
+        bulk.insert(model, created)
+        model.objects.bulk_update(
+            updated, [field.name for field in fields], batch_size=UPDATE_BATCH_SIZE
+        )
+
+
+def write_requests(records, lookups):
+    with profiling.stage("projects"):
+        projects = lookups.projects.resolve(record["project"] for record in records)
+    with profiling.stage("addresses"):
+        address_ids = lookups.addresses.resolve(r["address"] for r in records)
+    requests = {}
+    for record, address_id in zip(records, address_ids):
+        project_id = projects[record["project"]]
+        # Later rows for the same project win, as update_or_create did.
+        requests[project_id] = models.WorkRequest(
+            project_id=project_id,
+            address_id=address_id,
+            **record["values"],
+            **attribute_ids(record, REQUEST_ATTRIBUTES, lookups),
+        )
+    save_by_project(models.WorkRequest, requests, WORK_REQUEST_FIELDS)
+
+
+def import_file(kind, path, incremental=False, projects=None):
+    """
+    Import one export with project.importer, in this process, and write the
+    run's profile report.
+    """
+    from . import importer
+
+    with profiling.profile(f"process_{kind}") as report:
+        counts = importer.run_import([kind], 1, incremental, {kind: path}, projects)
+    report["counts"] = counts
+    profiling.write_report(report)
+    return counts[kind]
+
+
+def process_requests(path="data/work_request.csv", incremental=False, projects=None):
+    return import_file("requests", path, incremental, projects)
+
+
+WORK_ORDER_FIELDS = [
+    "status",
+    "created",
+    "updated",
+    "start",
+    "end",
+    "category",
+    "department",
+    "division",
+    "priority",
+    "total_cost",
+    "quantity",
+    "labor_hours",
+    "labor_cost",
+    "equipment_cost",
+    "material_cost",
+    "contractor_cost",
+    "misc_cost",
+    "duration",
+    "billing_required",
+    "task",
+    "cause",
+    "problem",
+    "asset",
+    "assigned_crew",
+    "supervisor",
+    "lead_worker",
+    "address",
+    "facility",
+    "project_number",
+    "route",
+]
+
+
+ORDER_COLUMNS = (
+    [
+        "Work Order Number",
+        "Creation Date",
+        "priority",
+        "Status Date",
+        "Start Date",
+        "End Date",
+        "Total Cost",
+        "Quantity",
+        "Actual Labor Hours",
+        "Actual Labor Cost",
+        "Actual Equip Cost",
+        "Actual Material Cost",
+        "Contractor Cost",
+        "Misc. Cost",
+        "Duration Actual(Hrs)",
+        "Billing Required",
+        "Supervisor",
+        "LeadWorker Id",
+        "Project Number",
+        "Asset",
+        "Desc 1",
+        "Desc 2",
+        "Facility Location",
+    ]
+    + ADDRESS_COLUMNS
+    + attribute_columns(ORDER_ATTRIBUTES)
+)
+
+
+def normalize_order(r):
+    return {
+        "project": r["Work Order Number"],
+        "address": address_attributes(r),
+        "asset": (r["Asset"] or "", r["Desc 1"] or "", r["Desc 2"] or ""),
+        "facility": r["Facility Location"] or None,
+        "codes": {key: r[key] for key, _, _, _ in ORDER_ATTRIBUTES},
+        "values": {
+            "created": parse_date(r["Creation Date"]),
+            "priority": (r.get("priority") or None) and int(r["priority"]),
+            "updated": parse_date(r["Status Date"]),
+            "start": parse_date(r["Start Date"]),
+            "end": parse_date(r["End Date"]),
+            "total_cost": r["Total Cost"],
+            "quantity": r["Quantity"],
+            "labor_hours": r["Actual Labor Hours"],
+            "labor_cost": r["Actual Labor Cost"],
+            "equipment_cost": r["Actual Equip Cost"],
+            "material_cost": r["Actual Material Cost"],
+            "contractor_cost": r["Contractor Cost"],
+            "misc_cost": r["Misc. Cost"],
+            "duration": r["Duration Actual(Hrs)"],
+            "billing_required": r["Billing Required"] == "TRUE",
+            "supervisor": r["Supervisor"] or None,
+            "lead_worker": r["LeadWorker Id"] or None,
+            "project_number": r["Project Number"],
+        },
+    }
+
+
+def build_orders(records, lookups):
+    with profiling.stage("projects"):
+        projects = lookups.projects.resolve(record["project"] for record in records)
+    with profiling.stage("addresses"):
+        address_ids = lookups.addresses.resolve(r["address"] for r in records)
+    with profiling.stage("assets"):
+        asset_ids = lookups.asset_ids(record["asset"] for record in records)
+    with profiling.stage("facilities"):
+        facility_ids = lookups.facility_ids(r["facility"] for r in records)
+    orders = {}
+    for record, address_id, asset_id, facility_id in zip(
+        records, address_ids, asset_ids, facility_ids
+    ):
+        project_id = projects[record["project"]]
+        # Later rows for the same project win, as update_or_create did.
+        orders[project_id] = models.WorkOrder(
+            project_id=project_id,
+            address_id=address_id,
+            asset_id=asset_id,
+            facility_id=facility_id,
+            **record["values"],
+            **attribute_ids(record, ORDER_ATTRIBUTES, lookups),
+        )
+    return orders
+
+
+def write_orders(records, lookups):
+    save_by_project(models.WorkOrder, build_orders(records, lookups), WORK_ORDER_FIELDS)
+
+
+def process_orders(
+    path="data/work_order_summary.csv", incremental=False, projects=None
+):
+    return import_file("orders", path, incremental, projects)
+
+
+DETAIL_STAGING_COLUMNS = [
+    # The position of the row in the file, used to keep the file's order.
+    ("line", "bigint"),
+    ("project_code", "varchar(64)"),
+    ("created", "date"),
+    ("start", "date"),
+    ("end", "date"),
+    ("duration", "integer"),
+    ("updated", "date"),
+    ("task_code", "varchar(64)"),
+    ("resource_code", "varchar(64)"),
+    ("resource_type_code", "varchar(64)"),
+    ("resource_text", "varchar(256)"),
+    ("default_unit_cost", "numeric(12, 4)"),
+    ("resource_desc", "varchar(256)"),
+    ("unit_cost", "numeric(12, 4)"),
+    ("units", "numeric(12, 4)"),
+    ("total_cost", "numeric(12, 4)"),
+    ("total_units", "numeric(12, 4)"),
+    ("unit_cost_regular_time", "numeric(12, 4)"),
+    ("unit_cost_overtime", "numeric(12, 4)"),
+    ("overtime_unit_cost", "numeric(12, 4)"),
+    ("grand_total_cost", "numeric(12, 4)"),
+    ("time_cost_code", "varchar(64)"),
+    ("unit_code", "varchar(64)"),
+    # Filled in from the project and resource maps before the row is staged.
+    ("project_id", "integer"),
+    ("resource_id", "integer"),
+]
+
+# Columns copied straight from the staging table into WorkDetail.
+DETAIL_VALUE_COLUMNS = [
+    "created",
+    "start",
+    "end",
+    "duration",
+    "updated",
+    "resource_desc",
+    "unit_cost",
+    "units",
+    "total_cost",
+    "total_units",
+    "unit_cost_regular_time",
+    "unit_cost_overtime",
+    "overtime_unit_cost",
+    "grand_total_cost",
+]
+
+
+DETAIL_COLUMNS = [
+    "Work Order Number",
+    "Creation Date",
+    "Start Date",
+    "End Date",
+    "Duration Actual(Hrs)",
+    "Status Date",
+    "Task Code",
+    "Resource",
+    "Resource Type",
+    "Resource Text",
+    "Default Unit Cost",
+    "Additional Description",
+    "Unit Cost",
+    "Units",
+    "Total Cost",
+    "Grand Total Units",
+    "Unit Cost-Regular Time",
+    "Unit Cost-Overtime",
+    "Override Unit Cost",
+    "Grand Total Cost",
+    "Time Cost",
+    "Unit of Measure",
+] + attribute_columns(DETAIL_ATTRIBUTES)
+
+DetailRow = namedtuple("DetailRow", [name for name, _ in DETAIL_STAGING_COLUMNS])
+
+
+def normalize_detail(r, line):
+    return DetailRow(
+        line,
+        r["Work Order Number"],
+        parse_date(r["Creation Date"]),
+        parse_date(r["Start Date"]),
+        parse_date(r["End Date"]),
+        r["Duration Actual(Hrs)"],
+        parse_date(r["Status Date"]),
+        r["Task Code"],
+        r["Resource"],
+        r["Resource Type"],
+        r["Resource Text"],
+        r["Default Unit Cost"] or None,
+        r["Additional Description"],
+        r["Unit Cost"] or None,
+        r["Units"] or None,
+        r["Total Cost"] or None,
+        r["Grand Total Units"] or None,
+        r["Unit Cost-Regular Time"] or None,
+        r["Unit Cost-Overtime"] or None,
+        r["Override Unit Cost"] or None,
+        r["Grand Total Cost"] or None,
+        r["Time Cost"],
+        r["Unit of Measure"],
+        None,
+        None,
     )
-    return resource
-
-
-def process_details():
-    populate_attribute_models("data/work_order_detail.csv", DETAIL_ATTRIBUTES)
-    with open("data/work_order_detail.csv", mode="r") as f:
-        dict_reader = csv.DictReader(f)
-        for r in dict_reader:
-            project = parse_project(r, "Work Order Number")
-            attributes = {
-                "created": parse_date(r["Creation Date"]),
-                "start": parse_date(r["Start Date"]),
-                "end": parse_date(r["End Date"]),
-                "duration": r["Duration Actual(Hrs)"],
-                "updated": parse_date(r["Status Date"]),
-                "resource_desc": r["Additional Description"],
-                "unit_cost": r["Unit Cost"] or None,
-                "units": r["Units"] or None,
-                "total_cost": r["Total Cost"] or None,
-                "total_units": r["Grand Total Units"] or None,
-                "unit_cost_regular_time": r["Unit Cost-Regular Time"] or None,
-                "unit_cost_overtime": r["Unit Cost-Overtime"] or None,
-                "overtime_unit_cost": r["Override Unit Cost"] or None,
-                "grand_total_cost": r["Grand Total Cost"] or None,
-                "resource": parse_resource(r),
-            }
-            for key, _, model, model_field in DETAIL_ATTRIBUTES:
-                if not model_field:
-                    continue
-                attributes[model_field] = model.objects.filter(code=r[key]).first()
-            models.WorkDetail.objects.update_or_create(
-                project=project, defaults=attributes
+
+
+DETAIL_STAGING_SQL = """
+INSERT INTO {detail} (
+    project_id, task_id, resource_id, time_cost_id, unit_id, {value_columns}
+)
+SELECT s.project_id, t.id, s.resource_id, tc.id, u.id, {staged_values}
+FROM {staging} s
+LEFT JOIN {task} t ON t.code = s.task_code
+LEFT JOIN {time_cost} tc ON tc.code = s.time_cost_code
+LEFT JOIN {unit} u ON u.code = s.unit_code
+ORDER BY s.line
+"""
+
+
+def resolve_resources(rows):
+    """
+    Create or update the resources of the detail rows and return their ids
+    by (resource code, resource type code). The most recently created row of
+    a resource sets its text and default unit cost.
+    """
+    types = dict(models.ResourceType.objects.values_list("code", "id"))
+    to_cost = models.Resource._meta.get_field("default_unit_cost").to_python
+    latest = {}
+    for row in rows:
+        type_id = types.get(row.resource_type_code)
+        if row.resource_code and type_id:
+            key = (row.resource_code, type_id)
+            order = (row.created or date.min, row.line)
+            if key not in latest or order > latest[key][0]:
+                latest[key] = (order, row)
+    resources = {
+        key: (row.resource_type_code, row.resource_text, to_cost(row.default_unit_cost))
+        for key, (_, row) in latest.items()
+    }
+    existing = {
+        values[:2]: values[2:]
+        for values in models.Resource.objects.values_list(
+            "code", "type_id", "id", "text", "default_unit_cost"
+        )
+    }
+    created, updated = [], []
+    for (code, type_id), (_, text, cost) in resources.items():
+        resource = models.Resource(
+            code=code, type_id=type_id, text=text, default_unit_cost=cost
+        )
+        current = existing.get((code, type_id))
+        if current is None:
+            created.append(resource)
+        elif current[1:] != (text, cost):
+            resource.id = current[0]
+            updated.append(resource)
+    if created:
+        models.Resource.objects.bulk_create(
+            created, batch_size=BATCH_SIZE, ignore_conflicts=True
+        )
+        existing.update(
+            (values[:2], values[2:])
+            for values in models.Resource.objects.values_list("code", "type_id", "id")
+        )
+    models.Resource.objects.bulk_update(
+        updated, ["text", "default_unit_cost"], batch_size=UPDATE_BATCH_SIZE
+    )
+    return {
+        (code, type_code): existing[code, type_id][0]
+        for (code, type_id), (type_code, _, _) in resources.items()
+    }
+
+
+def write_details(rows, projects, resources, replace=(), batch_size=BATCH_SIZE):
+    """
+    Save the detail rows, taking their project ids from ``projects`` and
+    their resource ids from ``resources`` as returned by
+    ``resolve_resources``. A detail line has no natural key, so the rows
+    replace every existing detail of the project ids in ``replace``.
+    """
+    qn = connection.ops.quote_name
+    staging = "project_workdetail_staging"
+    names = {
+        "detail": models.WorkDetail,
+        "task": models.Task,
+        "time_cost": models.TimeCost,
+        "unit": models.Unit,
+    }
+    sql_params = {name: qn(model._meta.db_table) for name, model in names.items()}
+    sql_params.update(
+        {
+            "staging": qn(staging),
+            "value_columns": ", ".join(qn(c) for c in DETAIL_VALUE_COLUMNS),
+            "staged_values": ", ".join(f"s.{qn(c)}" for c in DETAIL_VALUE_COLUMNS),
+        }
+    )
+    staging_columns = [name for name, _ in DETAIL_STAGING_COLUMNS]
+    with transaction.atomic(), connection.cursor() as cursor:
+        with profiling.stage("replace"):
+            for chunk in chunked(replace):
+                models.WorkDetail.objects.filter(project_id__in=chunk).delete()
+        cursor.execute(f"DROP TABLE IF EXISTS {qn(staging)}")
+        cursor.execute(
+            "CREATE TEMPORARY TABLE {} ({})".format(
+                qn(staging),
+                ", ".join(f"{qn(c)} {t}" for c, t in DETAIL_STAGING_COLUMNS),
+            )
+        )
+        rows = (
+            row._replace(
+                project_id=projects[row.project_code],
+                resource_id=resources.get((row.resource_code, row.resource_type_code)),
             )
+            for row in rows
+        )
+        with profiling.stage("copy"):
+            profiling.add_rows(
+                bulk.copy_rows(cursor, staging, staging_columns, rows, batch_size)
+            )
+        with profiling.stage("insert"):
+            cursor.execute(DETAIL_STAGING_SQL.format(**sql_params))
+        cursor.execute(f"DROP TABLE {qn(staging)}")
+
+
+def process_details(
+    path="data/work_order_detail.csv", incremental=False, projects=None
+):
+    return import_file("details", path, incremental, projects)
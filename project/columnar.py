@@ -0,0 +1,133 @@
+"""
+In-memory columnar engine for the dashboard charts.
+
+With ``ANALYTICS_ENGINE = "numpy"`` each process loads WorkOrderFact into
+NumPy arrays: every domain's texts are dictionary-encoded as int codes, the
+filter dimensions are kept as ids and the measures as float64. Charts are
+then answered with ``bincount`` and ``lexsort`` without touching the
+database. The arrays are reloaded when the import generation changes.
+
+Percentiles are exact and interpolate like ``PERCENTILE_CONT``; the standard
+deviation is the population one, as ``StdDev`` computes it.
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+
+from . import cache, cube, facts, models
+from .analyze import STATS, as_list, percentile_of
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+FILTERS = ["department_id", "division_id", "category_id"]
+
+_loaded = {"generation": None, "table": None}
+
+
+def check():
+    if np is None:
+        raise ImproperlyConfigured(
+            'ANALYTICS_ENGINE = "numpy" requires numpy to be installed.'
+        )
+
+
+class ColumnTable:
+    """The work order facts as NumPy columns."""
+
+    def __init__(self, rows):
+        rows = list(rows)
+        width = len(FILTERS) + len(cube.DOMAINS) + len(facts.MEASURES)
+        columns = list(zip(*rows)) if rows else [()] * width
+        self.filters = {
+            name: np.array([-1 if v is None else v for v in values], dtype=np.int64)
+            for name, values in zip(FILTERS, columns)
+        }
+        self.domains = {}
+        for domain, values in zip(cube.DOMAINS, columns[len(FILTERS) :]):
+            labels = sorted({v for v in values if v is not None})
+            index = {label: i for i, label in enumerate(labels)}
+            codes = np.array(
+                [-1 if v is None else index[v] for v in values], dtype=np.int64
+            )
+            self.domains[domain] = (labels, codes)
+        self.measures = {
+            name: np.array(values, dtype=np.float64)
+            for name, values in zip(
+                facts.MEASURES, columns[len(FILTERS) + len(cube.DOMAINS) :]
+            )
+        }
+
+    @classmethod
+    def load(cls):
+        fields = FILTERS + [facts.fact_field(d) for d in cube.DOMAINS]
+        fields += facts.MEASURES
+        return cls(models.WorkOrderFact.objects.values_list(*fields).iterator())
+
+    def analyze(self, domain, range, stats=None, **filters):
+        """
+        The equivalent of ``project.analyze.analyze`` over the facts: one
+        dict per domain label with the requested statistics of each range.
+        """
+        labels, codes = self.domains[domain]
+        mask = codes >= 0
+        for name, value in filters.items():
+            if value is not None:
+                mask &= self.filters[f"{name}_id"] == value.pk
+        groups = codes[mask]
+        counts = np.bincount(groups, minlength=len(labels))
+        present = np.flatnonzero(counts)
+        data = [{domain: labels[i]} for i in present]
+        for r in as_list(range):
+            values = self.measures[r][mask]
+            for stat in as_list(stats or STATS):
+                result = self.summarize(stat, groups, values, counts)[present]
+                for row, value in zip(data, result.tolist()):
+                    row[f"{r}_{stat}"] = value
+        return data
+
+    def summarize(self, stat, groups, values, counts):
+        size = len(counts)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if stat == "count":
+                return counts
+            sums = np.bincount(groups, weights=values, minlength=size)
+            if stat == "sum":
+                return sums
+            means = sums / counts
+            if stat == "avg":
+                return means
+            if stat == "stddev":
+                deviations = (values - means[groups]) ** 2
+                return np.sqrt(
+                    np.bincount(groups, weights=deviations, minlength=size) / counts
+                )
+        percentile = percentile_of(stat)
+        if percentile is None:
+            raise ValueError(f"Unknown statistic {stat!r}")
+        if not len(values):
+            return np.full(size, np.nan)
+        ordered = values[np.lexsort((values, groups))]
+        starts = np.cumsum(counts) - counts
+        position = percentile * np.maximum(counts - 1, 0)
+        low = np.floor(position).astype(np.int64)
+        high = np.ceil(position).astype(np.int64)
+        # Groups without values point past the end; they are dropped anyway.
+        last = len(ordered) - 1
+        lower = ordered[np.minimum(starts + low, last)]
+        upper = ordered[np.minimum(starts + high, last)]
+        return lower + (upper - lower) * (position - low)
+
+
+def table():
+    check()
+    generation = cache.current_generation()
+    if _loaded["generation"] != generation:
+        _loaded["table"] = ColumnTable.load()
+        _loaded["generation"] = generation
+    return _loaded["table"]
+
+
+def analyze(domain, range, stats=None, **filters):
+    return table().analyze(domain, range, stats, **filters)
@@ -0,0 +1,192 @@
+"""
+Pre-aggregated work orders for the dashboard charts.
+
+For every chartable domain the cube keeps one row per domain value within
+each (department, division, category) partition, holding the order count
+and the sum, sum of squares and a t-digest of each measure. A chart is then
+the merge of the cells matching its filters, so its cost depends on the
+number of distinct domain values rather than on the number of orders.
+
+The importer refreshes only the partitions whose orders it wrote, and
+``rebuild`` does the same for the other summaries partitioned this way.
+"""
+
+import math
+
+from django.db import transaction
+from django.db.models import Q
+
+from . import models
+from .analyze import STATS, as_list, percentile_of
+from .reader import chunked
+from .sketch import TDigest
+
+DOMAINS = [
+    "category__text",
+    "cause__text",
+    "assigned_crew__text",
+    "department__text",
+    "division__text",
+    "problem__text",
+    "task__text",
+]
+
+MEASURES = ["total_cost", "labor_hours"]
+
+PARTITION_FIELDS = ["department_id", "division_id", "category_id"]
+
+BATCH_SIZE = 500
+
+# Partitions per refresh query, keeping the OR'ed filter small.
+PARTITION_BATCH_SIZE = 100
+
+
+def domain_field(domain):
+    return domain.split("__")[0]
+
+
+def partition_filter(partitions):
+    query = Q(pk__in=[])
+    for partition in partitions:
+        lookups = {}
+        for field, value in zip(PARTITION_FIELDS, partition):
+            if value is None:
+                lookups[f"{field}__isnull"] = True
+            else:
+                lookups[field] = value
+        query |= Q(**lookups)
+    return query
+
+
+def affected_partitions(codes):
+    """The partitions holding the work orders of the given projects."""
+    partitions = set()
+    for chunk in chunked(codes, BATCH_SIZE):
+        partitions.update(
+            models.WorkOrder.objects.filter(project__code__in=chunk).values_list(
+                *PARTITION_FIELDS
+            )
+        )
+    return partitions
+
+
+def build_cells(orders):
+    fields = [domain_field(d) + "_id" for d in DOMAINS]
+    cells = {}
+    for row in orders.values_list(*PARTITION_FIELDS, *MEASURES, *fields).iterator():
+        partition = row[: len(PARTITION_FIELDS)]
+        measures = [float(v) for v in row[len(PARTITION_FIELDS) : -len(fields)]]
+        for domain, member in zip(DOMAINS, row[-len(fields) :]):
+            if member is None:
+                continue
+            cell = cells.setdefault(
+                (domain, member) + partition, [[] for _ in MEASURES]
+            )
+            for values, value in zip(cell, measures):
+                values.append(value)
+    for (domain, member, department, division, category), cell in cells.items():
+        kwargs = {}
+        for measure, values in zip(MEASURES, cell):
+            kwargs[f"{measure}_sum"] = sum(values)
+            kwargs[f"{measure}_sum_squares"] = sum(v * v for v in values)
+            kwargs[f"{measure}_sketch"] = TDigest.from_values(values).dumps()
+        yield models.WorkOrderCube(
+            domain=domain,
+            member=member,
+            department_id=department,
+            division_id=division,
+            category_id=category,
+            count=len(cell[0]),
+            **kwargs,
+        )
+
+
+@transaction.atomic
+def rebuild(model, build, partitions=None):
+    """
+    Replace the rows of a partitioned summary ``model`` with ``build`` of
+    the work orders in the given partitions, or rebuild it entirely when no
+    partitions are given.
+    """
+    if partitions is None:
+        model.objects.all().delete()
+        batches = [models.WorkOrder.objects.all()]
+    else:
+        batches = []
+        for chunk in chunked(partitions, PARTITION_BATCH_SIZE):
+            query = partition_filter(chunk)
+            model.objects.filter(query).delete()
+            batches.append(models.WorkOrder.objects.filter(query))
+    for orders in batches:
+        model.objects.bulk_create(build(orders), batch_size=BATCH_SIZE)
+
+
+def refresh_cube(partitions=None):
+    rebuild(models.WorkOrderCube, build_cells, partitions)
+
+
+def summarize(stat, count, total, squares, digest):
+    percentile = percentile_of(stat)
+    if percentile is not None:
+        return digest.quantile(percentile)
+    if stat == "count":
+        return count
+    if stat == "sum":
+        return total
+    avg = total / count
+    if stat == "avg":
+        return avg
+    if stat == "stddev":
+        return math.sqrt(max(squares / count - avg * avg, 0))
+    raise ValueError(f"Unknown statistic {stat!r}")
+
+
+def analyze(domain, range, stats=None, department=None, division=None, category=None):
+    """
+    The cube equivalent of ``project.analyze.analyze``: one dict per domain
+    label with the requested statistics of each ``range`` measure.
+    Percentiles come from the merged sketches, so they are approximate.
+    """
+    ranges = as_list(range)
+    stats = as_list(stats or STATS)
+    cells = models.WorkOrderCube.objects.filter(domain=domain)
+    for field, value in [
+        ("department", department),
+        ("division", division),
+        ("category", category),
+    ]:
+        if value is not None:
+            cells = cells.filter(**{field: value})
+    # Loading the sketches is most of the work, so skip them when possible.
+    sketches = any(percentile_of(s) is not None for s in stats)
+    columns = ["member", "count"]
+    for r in ranges:
+        columns += [f"{r}_sum", f"{r}_sum_squares"]
+        if sketches:
+            columns.append(f"{r}_sketch")
+    width = 3 if sketches else 2
+    model = models.WorkOrder._meta.get_field(domain_field(domain)).related_model
+    labels = dict(model.objects.values_list("id", "text"))
+    groups = {}
+    for member, count, *measures in cells.values_list(*columns):
+        group = groups.setdefault(
+            labels[member], [[0, 0.0, 0.0, TDigest()] for _ in ranges]
+        )
+        for i, summary in enumerate(group):
+            total, squares, *sketch = measures[i * width : (i + 1) * width]
+            summary[0] += count
+            summary[1] += total
+            summary[2] += squares
+            if sketches:
+                summary[3].merge(TDigest.loads(sketch[0]))
+    return [
+        {
+            domain: label,
+            **{
+                f"{r}_{s}": summarize(s, *summary)
+                for r, summary in zip(ranges, group)
+                for s in stats
+            },
+        }
+        for label, group in groups.items()
+    ]
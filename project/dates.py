@@ -0,0 +1,78 @@
+"""
+Date parsing for the CSV exports.
+
+Dates in the exports look like ``M/D/YYYY``, optionally followed by
+``H:MM`` or ``H:MM:SS``. Those are parsed by splitting the string, which is
+several times faster than trying ``datetime.strptime`` with each format in
+turn. Anything else falls back to strptime so invalid values still raise
+ValueError. The exports repeat the same few hundred dates, so results are
+memoized.
+"""
+
+from datetime import date, datetime
+from functools import lru_cache
+
+import pytz
+
+TZ = pytz.timezone("America/Chicago")
+
+DATETIME_FORMATS = ["%m/%d/%Y %H:%M:%S", "%m/%d/%Y %H:%M"]
+DATE_FORMATS = DATETIME_FORMATS + ["%m/%d/%Y"]
+
+CACHE_SIZE = 4096
+
+
+def strptime(value, formats):
+    for format in formats[:-1]:
+        try:
+            return datetime.strptime(value, format)
+        except ValueError:
+            pass
+    return datetime.strptime(value, formats[-1])
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def split_datetime(value, require_time=False):
+    """
+    Split ``M/D/YYYY[ H:MM[:SS]]`` into a tuple of integers, falling back to
+    strptime for any other shape.
+    """
+    try:
+        date_part, separator, time_part = value.partition(" ")
+        month, day, year = date_part.split("/")
+        if (separator or require_time) and not time_part:
+            raise ValueError(value)
+        time_parts = time_part.split(":") if time_part else []
+        if len(time_parts) not in (0, 2, 3):
+            raise ValueError(value)
+        hour, minute, second = (time_parts + ["0", "0", "0"])[:3]
+        # int() also takes signs, underscores and padding strptime rejects.
+        parts = (month, day, hour, minute, second)
+        digits = year + "".join(parts)
+        if (
+            len(year) != 4
+            or not all(1 <= len(part) <= 2 for part in parts)
+            or not (digits.isascii() and digits.isdigit())
+        ):
+            raise ValueError(value)
+        values = tuple(int(v) for v in (year, month, day, hour, minute, second))
+        # Validate the ranges the same way strptime would.
+        datetime(*values)
+        return values
+    except ValueError:
+        d = strptime(value, DATETIME_FORMATS if require_time else DATE_FORMATS)
+        return (d.year, d.month, d.day, d.hour, d.minute, d.second)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_datetime(date_str, time_str):
+    year, month, day, _, _, _ = split_datetime(date_str, require_time=True)
+    _, _, _, hour, minute, second = split_datetime(time_str, require_time=True)
+    return TZ.localize(datetime(year, month, day, hour, minute, second))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def parse_date(date_str):
+    if not date_str:
+        return None
+    return date(*split_datetime(date_str)[:3])
@@ -0,0 +1,168 @@
+"""
+Work order facts for the dashboard.
+
+Every work order is copied into WorkOrderFact with the code and text of the
+dimensions the dashboard filters and groups on, and with its measures as
+floats. Dashboard reads are then single-table scans with no joins and no
+Decimal conversion. The importer rebuilds the facts of the projects it
+wrote, and ``sync_texts`` carries attribute text changes into the copies.
+"""
+
+from django.db import connection, transaction
+
+from . import cache, models
+from .reader import chunked
+
+BATCH_SIZE = 500
+
+# Dimension to whether its code is copied too.
+DIMENSIONS = {
+    "category": True,
+    "department": True,
+    "division": True,
+    "task": False,
+    "cause": False,
+    "problem": False,
+    "assigned_crew": False,
+}
+
+# The dashboard's filter dimensions.
+OPTION_DIMENSIONS = ["department", "division", "category"]
+
+MEASURES = [
+    "total_cost",
+    "labor_hours",
+    "labor_cost",
+    "equipment_cost",
+    "material_cost",
+    "contractor_cost",
+    "misc_cost",
+]
+
+SYNC_TEXT_SQL = """
+UPDATE {table} SET {column} = (
+    SELECT text FROM {attribute} WHERE {attribute}.id = {table}.{key}
+)
+WHERE {key} IS NOT NULL AND ({column} IS NULL OR {column} <> (
+    SELECT text FROM {attribute} WHERE {attribute}.id = {table}.{key}
+))
+"""
+
+
+def fact_field(domain):
+    """The fact column of a dashboard domain, "task_text" for "task__text"."""
+    return domain.replace("__", "_")
+
+
+def build_facts(orders):
+    fields = ["project_id", "project__code", "created", "updated"]
+    for dimension, code in DIMENSIONS.items():
+        fields.append(f"{dimension}_id")
+        if code:
+            fields.append(f"{dimension}__code")
+        fields.append(f"{dimension}__text")
+    fields += MEASURES
+    names = [fact_field(f) for f in fields]
+    for row in orders.values_list(*fields).iterator():
+        values = dict(zip(names, row))
+        for measure in MEASURES:
+            values[measure] = float(values[measure])
+        yield models.WorkOrderFact(**values)
+
+
+@transaction.atomic
+def refresh_facts(codes=None):
+    """
+    Rebuild the facts of the given projects, or all of them when no project
+    codes are given.
+    """
+    if codes is None:
+        models.WorkOrderFact.objects.all().delete()
+        batches = [models.WorkOrder.objects.all()]
+    else:
+        batches = []
+        for chunk in chunked(codes, BATCH_SIZE):
+            models.WorkOrderFact.objects.filter(project__code__in=chunk).delete()
+            batches.append(models.WorkOrder.objects.filter(project__code__in=chunk))
+    for orders in batches:
+        models.WorkOrderFact.objects.bulk_create(
+            build_facts(orders), batch_size=BATCH_SIZE
+        )
+
+
+def sync_texts(model, fields):
+    """
+    Copy the current text of the attributes referenced by the foreign keys
+    ``fields`` of ``model`` into their ``{field}_text`` columns, touching
+    only the rows whose copy is out of date.
+    """
+    qn = connection.ops.quote_name
+    table = qn(model._meta.db_table)
+    with connection.cursor() as cursor:
+        for name in fields:
+            field = model._meta.get_field(name)
+            cursor.execute(
+                SYNC_TEXT_SQL.format(
+                    table=table,
+                    column=qn(f"{name}_text"),
+                    attribute=qn(field.related_model._meta.db_table),
+                    key=qn(field.column),
+                )
+            )
+
+
+def sync_fact_texts():
+    sync_texts(models.WorkOrderFact, DIMENSIONS)
+
+
+def dimension_options():
+    """
+    The departments, divisions and categories that have work orders, as
+    lists of {"code", "text"} dicts ordered by text, and the (department,
+    division, category) code combinations that occur, from a single query.
+    """
+    texts = {dimension: {} for dimension in OPTION_DIMENSIONS}
+    combinations = set()
+    rows = models.WorkOrderFact.objects.values_list(
+        *[f"{d}_{part}" for d in OPTION_DIMENSIONS for part in ("code", "text")]
+    ).distinct()
+    for row in rows:
+        codes = row[0::2]
+        for dimension, code, text in zip(OPTION_DIMENSIONS, codes, row[1::2]):
+            if code is not None:
+                texts[dimension][code] = text
+        combinations.add(codes)
+    options = {
+        dimension: [
+            {"code": code, "text": text}
+            for code, text in sorted(values.items(), key=lambda item: item[1])
+        ]
+        for dimension, values in texts.items()
+    }
+    options["combinations"] = list(combinations)
+    return options
+
+
+def options():
+    """``dimension_options`` cached for the current import generation."""
+    return cache.cached_value("options", dimension_options)
+
+
+def cascade(available, **selected):
+    """
+    The options of every dimension that occur together with the selected
+    codes of the other dimensions, e.g. the divisions of a department.
+    """
+    valid = {dimension: set() for dimension in OPTION_DIMENSIONS}
+    for combination in available["combinations"]:
+        for i, dimension in enumerate(OPTION_DIMENSIONS):
+            if all(
+                selected.get(other) in (None, combination[j])
+                for j, other in enumerate(OPTION_DIMENSIONS)
+                if j != i
+            ):
+                valid[dimension].add(combination[i])
+    return {
+        dimension: [o for o in available[dimension] if o["code"] in valid[dimension]]
+        for dimension in OPTION_DIMENSIONS
+    }
@@ -0,0 +1,292 @@
+"""
+Parallel import of the CSV exports.
+
+Each file is split into byte ranges on record boundaries, which a process
+pool parses and normalizes a few ranges ahead of the parent, so only those
+batches are held in memory however large the file is. Batch by batch, in
+file order, the parent resolves the dimension rows (attributes, projects,
+addresses, assets, facilities) so the workers never race to create them,
+then the records are partitioned by project and written by the pool, each
+worker on its own database connection. Detail resources are resolved by a
+first pass over the file, as the most recent row of a resource wins.
+
+The clean.process_* loaders run the same import with a single worker.
+"""
+
+import csv
+import io
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager, nullcontext
+from itertools import chain
+
+from django.db import connection, connections, transaction
+
+from . import clean, productivity, profiling, reader, worker
+from .delta import ImportDelta
+
+LOADERS = {
+    "requests": (
+        "data/work_request.csv",
+        clean.REQUEST_ATTRIBUTES,
+        "Requisition Number",
+    ),
+    "orders": (
+        "data/work_order_summary.csv",
+        clean.ORDER_ATTRIBUTES,
+        "Work Order Number",
+    ),
+    "details": (
+        "data/work_order_detail.csv",
+        clean.DETAIL_ATTRIBUTES,
+        "Work Order Number",
+    ),
+}
+
+COLUMNS = {
+    "requests": clean.REQUEST_COLUMNS,
+    "orders": clean.ORDER_COLUMNS,
+    "details": clean.DETAIL_COLUMNS,
+}
+
+# Bytes of the file parsed by a worker at a time.
+CHUNK_BYTES = 1024 * 1024
+# Chunks parsed ahead of the writes per worker, bounding the memory held.
+CHUNKS_AHEAD = 2
+
+
+def split_file(path, size=CHUNK_BYTES):
+    """
+    Split the records of a CSV file into byte ranges of about ``size``
+    bytes. Quoted fields can hold newlines, so a range only ends at a
+    newline preceded by a balanced number of quotes.
+    """
+    with open(path, mode="rb") as f:
+        header = f.readline()
+        start = position = f.tell()
+        ranges = []
+        quoted = False
+        for line in f:
+            position += len(line)
+            if line.count(b'"') % 2:
+                quoted = not quoted
+            if not quoted and position - start >= size:
+                ranges.append((start, position))
+                start = position
+        if position > start:
+            ranges.append((start, position))
+    fieldnames = next(csv.reader([header.decode()]))
+    return fieldnames, ranges
+
+
+def parse_rows(kind, rows, offset=0):
+    if kind == "details":
+        # The byte offset plus the row's index keeps the file's order.
+        return [clean.normalize_detail(r, offset + i) for i, r in enumerate(rows)]
+    if kind == "orders":
+        return [clean.normalize_order(r) for r in rows]
+    return [clean.normalize_request(r) for r in rows]
+
+
+def parse_chunk(kind, path, fieldnames, start, end):
+    with open(path, mode="rb") as f:
+        f.seek(start)
+        data = f.read(end - start).decode()
+    rows = reader.project_rows(io.StringIO(data), COLUMNS[kind], fieldnames)
+    return parse_rows(kind, rows, start)
+
+
+def parse_batches(kind, path, pool=None, workers=1):
+    """
+    Yield the normalized records of a file in batches, in file order. With a
+    pool the batches are parsed by the workers, ``CHUNKS_AHEAD`` per worker
+    ahead of the caller.
+    """
+    if pool is None or reader.is_compressed(path):
+        # Compressed files can't be split into byte ranges.
+        offset = 0
+        for rows in reader.read_batches(path, COLUMNS[kind], clean.BATCH_SIZE):
+            yield parse_rows(kind, rows, offset)
+            offset += len(rows)
+        return
+    fieldnames, ranges = split_file(path, CHUNK_BYTES)
+    pending = deque()
+    for start, end in ranges:
+        pending.append(pool.submit(parse_chunk, kind, path, fieldnames, start, end))
+        if len(pending) >= workers * CHUNKS_AHEAD:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def record_project(kind, record):
+    return record.project_code if kind == "details" else record["project"]
+
+
+def read_batches(kind, path, pool, workers, codes=None):
+    """The batches of records of the projects in ``codes``, or of all."""
+    for records in parse_batches(kind, path, pool, workers):
+        if codes is not None:
+            records = [r for r in records if record_project(kind, r) in codes]
+        if records:
+            yield records
+
+
+def prepare(kind, records, lookups):
+    """Resolve the dimension rows of a batch and return its project ids."""
+    ids = lookups.projects.resolve(record_project(kind, r) for r in records)
+    if kind == "details":
+        return ids
+    if kind == "orders":
+        lookups.asset_ids({record["asset"] for record in records})
+    for chunk in clean.chunked(records):
+        lookups.addresses.resolve(record["address"] for record in chunk)
+        if kind == "orders":
+            lookups.facility_ids(record["facility"] for record in chunk)
+    return ids
+
+
+def write_records(kind, records, lookups, resources=None, replace=()):
+    if kind == "details":
+        ids = lookups.projects.resolve(record.project_code for record in records)
+        clean.write_details(records, ids, resources, replace)
+        return len(records)
+    write = clean.write_orders if kind == "orders" else clean.write_requests
+    with transaction.atomic():
+        for chunk in clean.chunked(records):
+            write(chunk, lookups)
+    return len(records)
+
+
+def write_partition(kind, records, project_ids, resources=None, replace=()):
+    """Write the records of a partition of a batch in a worker process."""
+    _, attributes, _ = LOADERS[kind]
+    lookups = clean.ImportLookups(attributes, clean.ProjectRegistry(project_ids))
+    return write_records(kind, records, lookups, resources, replace)
+
+
+def write_batch(kind, records, ids, lookups, resources, replace, pool, write_workers):
+    """
+    Write a batch of records. ``replace`` holds the ids of the projects
+    whose existing details the batch replaces.
+    """
+    if pool is None or write_workers <= 1:
+        return write_records(kind, records, lookups, resources, replace)
+    partitions = [[] for _ in range(write_workers)]
+    for record in records:
+        partitions[hash(record_project(kind, record)) % write_workers].append(record)
+    futures = []
+    for partition in partitions:
+        if partition:
+            codes = {record_project(kind, record) for record in partition}
+            partition_replace = {ids[code] for code in codes} & replace
+            futures.append(
+                pool.submit(
+                    write_partition, kind, partition, ids, resources, partition_replace
+                )
+            )
+    # The next batch may update the same projects, so wait for this one.
+    return sum(future.result() for future in futures)
+
+
+def import_kind(kind, path, pool, workers, write_workers, incremental, projects):
+    _, attributes, project_field = LOADERS[kind]
+    with profiling.stage("fingerprints"):
+        delta = ImportDelta(kind, path, project_field)
+    counts = dict(delta.counts(), written=0)
+    if incremental and not delta.codes:
+        return counts
+    only = delta.codes if incremental else None
+    with profiling.stage("attributes"):
+        clean.populate_attribute_models(path, attributes)
+        lookups = clean.ImportLookups(attributes, projects)
+    # Writing in this process, the whole file is saved in one transaction.
+    # Workers write on their own connections, so they can only see the rows
+    # the parent has committed.
+    in_process = pool is None or write_workers <= 1
+    with transaction.atomic() if in_process else nullcontext():
+        if kind == "orders":
+            # Orders can move between summaries, so refresh the old ones too.
+            # A full import rebuilds every summary.
+            with profiling.stage("summaries"):
+                scope = clean.summary_scope(delta.codes) if incremental else None
+        resources = None
+        if kind == "details":
+            # The most recently created row of a resource wins, which may
+            # belong to an unchanged project, so read every row.
+            with profiling.stage("resources"):
+                rows = chain.from_iterable(read_batches(kind, path, pool, workers))
+                resources = clean.resolve_resources(rows)
+        # A project's existing details are deleted along with the first batch
+        # that holds its new ones.
+        replaced = set()
+        batches = read_batches(kind, path, pool, workers, only)
+        for records in profiling.timed("parse", batches):
+            with profiling.stage("prepare", len(records)):
+                ids = prepare(kind, records, lookups)
+                replace = set()
+                if kind == "details":
+                    replace = set(ids.values()) - replaced
+                    replaced |= replace
+            with profiling.stage("write", len(records)):
+                counts["written"] += write_batch(
+                    kind, records, ids, lookups, resources, replace, pool, write_workers
+                )
+        with profiling.stage("summaries"):
+            if kind == "orders":
+                clean.refresh_summaries(
+                    clean.summary_scope(delta.codes, scope) if incremental else None
+                )
+            elif kind == "details":
+                productivity.refresh_crew_months(
+                    productivity.affected_crews(delta.codes) if incremental else None
+                )
+            clean.sync_summary_texts()
+        with profiling.stage("fingerprints"):
+            delta.save()
+    with profiling.stage("cache"):
+        clean.finish_import()
+    return counts
+
+
+@contextmanager
+def worker_pool(workers):
+    """
+    A pool of ``workers`` processes, or None for a single worker. Workers
+    are spawned rather than forked so they don't inherit the parent's
+    database connections, which stay open across the batches.
+    """
+    if workers <= 1:
+        yield None
+        return
+    context = multiprocessing.get_context("spawn")
+    databases = {
+        alias: connections[alias].settings_dict["NAME"] for alias in connections
+    }
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=worker.setup,
+        initargs=(databases,),
+    ) as pool:
+        yield pool
+
+
+def run_import(kinds=None, workers=None, incremental=False, paths=None, projects=None):
+    workers = workers or os.cpu_count()
+    # SQLite only allows a single writer at a time.
+    write_workers = workers if connection.vendor == "postgresql" else 1
+    counts = {}
+    # Shared by the loaders, so each project code is looked up once.
+    if projects is None:
+        projects = clean.ProjectRegistry()
+    with worker_pool(workers) as pool:
+        for kind in kinds or LOADERS:
+            path = (paths or {}).get(kind) or LOADERS[kind][0]
+            with profiling.stage(kind):
+                counts[kind] = import_kind(
+                    kind, path, pool, workers, write_workers, incremental, projects
+                )
+    return counts
@@ -0,0 +1,42 @@
+import csv
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from project import dates, importer
+
+
+def strptime_date(value):
+    # The parser the loaders used before project.dates.
+    return dates.strptime(value, dates.DATE_FORMATS).date() if value else None
+
+
+def split_date(value):
+    return dates.date(*dates.split_datetime.__wrapped__(value)[:3]) if value else None
+
+
+class Command(BaseCommand):
+    help = "Compare the date parsers on the date columns of the CSV exports."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        values = []
+        for path, _, _ in importer.LOADERS.values():
+            with open(path, mode="r") as f:
+                for row in csv.DictReader(f):
+                    values.extend(v for k, v in row.items() if k.endswith(" Date"))
+        self.stdout.write(f"{len(values)} values, {len(set(values))} distinct")
+        runs = [
+            ("strptime", lambda: [strptime_date(v) for v in values]),
+            ("split", lambda: [split_date(v) for v in values]),
+            ("memoized", lambda: [dates.parse_date(v) for v in values]),
+        ]
+        baseline = None
+        for name, run in runs:
+            seconds = min(timeit.repeat(run, number=1, repeat=options["repeat"]))
+            baseline = baseline or seconds
+            self.stdout.write(
+                f"{name:>10}: {seconds * 1000:8.1f} ms  {baseline / seconds:5.1f}x"
+            )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from project import clean
+
+
+class Command(BaseCommand):
+    help = (
+        "Merge attribute rows that share a code, keeping the longest text and "
+        "repointing the work orders, requests and details that use them."
+    )
+
+    def handle(self, *args, **options):
+        clean.clean_attribute_duplicates()
@@ -0,0 +1,104 @@
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from project import cube, facts, models
+from project.analyze import analyze
+
+TABLES = "|".join(
+    model._meta.db_table for model in [models.WorkOrder, models.WorkOrderFact]
+)
+
+SEQUENTIAL_SCANS = {
+    "postgresql": re.compile(rf"Seq Scan on ({TABLES})\b"),
+    "sqlite": re.compile(rf"SCAN (TABLE )?({TABLES})\b(?! USING)"),
+}
+
+
+def dashboard_queries():
+    order = models.WorkOrder.objects.order_by("id").first()
+    if order is None:
+        raise CommandError("There are no work orders to plan queries against.")
+    orders = models.WorkOrder.objects.all()
+    filters = {
+        "department": {"department_id": order.department_id},
+        "department, division": {
+            "department_id": order.department_id,
+            "division_id": order.division_id,
+        },
+        "department, division, category": {
+            "department_id": order.department_id,
+            "division_id": order.division_id,
+            "category_id": order.category_id,
+        },
+    }
+    for name, lookups in filters.items():
+        for domain in cube.DOMAINS:
+            yield (
+                f"{domain} by {name}",
+                analyze(orders.filter(**lookups), domain, cube.MEASURES, ["sum"]),
+            )
+    yield (
+        "orders created in the last 30 days",
+        orders.filter(created__gte=order.created - timedelta(days=30)),
+    )
+    yield (
+        "orders updated in the last 30 days",
+        orders.filter(updated__gte=order.updated - timedelta(days=30)),
+    )
+    # The views read the facts when the analytics engine can't answer.
+    order_facts = models.WorkOrderFact.objects.all()
+    for name, lookups in filters.items():
+        for domain in cube.DOMAINS:
+            yield (
+                f"fact {domain} by {name}",
+                analyze(
+                    order_facts.filter(**lookups),
+                    facts.fact_field(domain),
+                    facts.MEASURES,
+                    ["sum"],
+                ),
+            )
+        # top_orders ranks the orders by cost within each group.
+        yield (
+            f"top orders by {name}",
+            order_facts.filter(**lookups).order_by("-total_cost"),
+        )
+    for group in ["department", "assigned_crew"]:
+        yield (
+            f"top orders per {group}",
+            order_facts.order_by(f"{group}_text", "-total_cost"),
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN the dashboard's work order and fact queries and fail if any "
+        "of them scans a whole table."
+    )
+
+    def handle(self, *args, **options):
+        pattern = SEQUENTIAL_SCANS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(f"EXPLAIN isn't supported on {connection.vendor}.")
+        scans = []
+        with transaction.atomic():
+            if connection.vendor == "postgresql":
+                # Small tables are cheaper to scan, so the planner would use
+                # sequential scans regardless of the indexes. Disabling them
+                # shows whether an index can serve the query.
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+            for name, queryset in dashboard_queries():
+                plan = queryset.explain()
+                if pattern.search(plan):
+                    scans.append(name)
+                    self.stdout.write(f"SEQUENTIAL SCAN {name}")
+                else:
+                    self.stdout.write(f"ok {name}")
+                if options["verbosity"] > 1:
+                    self.stdout.write(plan)
+        if scans:
+            raise CommandError(f"{len(scans)} dashboard queries scan a whole table.")
@@ -0,0 +1,68 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from project import importer, profiling
+
+
+class Command(BaseCommand):
+    help = "Import the public works CSV exports in parallel."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--only",
+            action="append",
+            choices=list(importer.LOADERS),
+            help="Import only this export, can be repeated. Defaults to all.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Number of worker processes, defaults to the number of CPUs.",
+        )
+        for kind, (path, _, _) in importer.LOADERS.items():
+            parser.add_argument(
+                f"--{kind}-file",
+                default=path,
+                help=f"Path of the {kind} export, may be gzipped. Defaults to {path}.",
+            )
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Only write the projects that are new or changed since the "
+            "last import.",
+        )
+        parser.add_argument(
+            "--profile-report",
+            metavar="PATH",
+            help="Write the JSON report of the time, queries and rows of each "
+            "import stage to PATH, or to stdout for -. Defaults to the "
+            "IMPORT_PROFILE_REPORT setting.",
+        )
+        parser.add_argument(
+            "--cprofile",
+            metavar="PATH",
+            help="Profile the import with cProfile and dump the stats to PATH. "
+            "Only the main process is profiled.",
+        )
+
+    def handle(self, *args, **options):
+        with profiling.profile("import_data", options["cprofile"]) as report:
+            counts = importer.run_import(
+                options["only"],
+                workers=options["workers"],
+                incremental=options["incremental"],
+                paths={kind: options[f"{kind}_file"] for kind in importer.LOADERS},
+            )
+        for kind, count in counts.items():
+            self.stdout.write(
+                f"{kind}: {count['written']} rows written, {count['new']} new, "
+                f"{count['changed']} changed, {count['unchanged']} unchanged "
+                "projects."
+            )
+        report["counts"] = counts
+        if options["profile_report"] == "-":
+            self.stdout.write(json.dumps(report, indent=2))
+        else:
+            profiling.write_report(report, options["profile_report"])
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from project import clean
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the work order cube, rollups, crew months and facts from the "
+        "imported data, e.g. after migrating a database that already has it."
+    )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            clean.refresh_summaries()
+        clean.finish_import()
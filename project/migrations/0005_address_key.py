@@ -0,0 +1,14 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("project", "0004_auto_20190928_1614")]
+
+    operations = [
+        migrations.AddField(
+            model_name="address",
+            name="key",
+            field=models.CharField(max_length=40, null=True),
+        )
+    ]
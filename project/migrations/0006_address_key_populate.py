@@ -0,0 +1,54 @@
+import hashlib
+
+from django.db import migrations
+
+# Frozen copies of project.models.ADDRESS_KEY_FIELDS and address_key, so
+# the keys this migration computes don't change with the model code.
+ADDRESS_KEY_FIELDS = [
+    "street_number",
+    "street_direction",
+    "street_name",
+    "street_type",
+    "street_suffix",
+    "zipcode",
+    "street2",
+    "other",
+]
+
+
+def address_key(values):
+    parts = [
+        " ".join(str(values.get(f) or "").split()).upper() for f in ADDRESS_KEY_FIELDS
+    ]
+    return hashlib.sha1("\x1f".join(parts).encode()).hexdigest()
+
+
+def populate_address_keys(apps, schema_editor):
+    Address = apps.get_model("project", "Address")
+    survivors = {}
+    for address in Address.objects.order_by("id"):
+        key = address_key({f: getattr(address, f) for f in ADDRESS_KEY_FIELDS})
+        if key in survivors:
+            # Point everything at the first copy of the address and drop
+            # the duplicate so the key can be made unique.
+            for rel in Address._meta.related_objects:
+                rel.related_model.objects.filter(**{rel.field.name: address.id}).update(
+                    **{rel.field.name: survivors[key]}
+                )
+            address.delete()
+            continue
+        survivors[key] = address.id
+        address.key = key
+        address.save(update_fields=["key"])
+
+
+class Migration(migrations.Migration):
+
+    # The duplicates are deleted here and the key is made unique in the
+    # next migration: Postgres can't ALTER a table with pending deferred
+    # foreign key checks from the deletes in the same transaction.
+    dependencies = [("project", "0005_address_key")]
+
+    operations = [
+        migrations.RunPython(populate_address_keys, migrations.RunPython.noop)
+    ]
@@ -0,0 +1,14 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("project", "0006_address_key_populate")]
+
+    operations = [
+        migrations.AlterField(
+            model_name="address",
+            name="key",
+            field=models.CharField(max_length=40, unique=True),
+        )
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 2.2.28 on 2026-10-18 11:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("project", "0007_address_key_unique"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportFingerprint",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("kind", models.CharField(max_length=16)),
+                ("digest", models.CharField(max_length=40)),
+                ("status_date", models.DateField(blank=True, null=True)),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="fingerprints",
+                        to="project.Project",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("kind", "project")},
+            },
+        ),
+    ]
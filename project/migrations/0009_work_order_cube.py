@@ -0,0 +1,72 @@
+# Generated by Django 2.2.28 on 2026-10-18 11:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("project", "0008_import_fingerprint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WorkOrderCube",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("domain", models.CharField(max_length=32)),
+                ("member", models.IntegerField()),
+                ("count", models.IntegerField()),
+                ("total_cost_sum", models.FloatField()),
+                ("total_cost_sum_squares", models.FloatField()),
+                ("total_cost_sketch", models.TextField()),
+                ("labor_hours_sum", models.FloatField()),
+                ("labor_hours_sum_squares", models.FloatField()),
+                ("labor_hours_sketch", models.TextField()),
+                (
+                    "category",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="project.Category",
+                    ),
+                ),
+                (
+                    "department",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="project.Department",
+                    ),
+                ),
+                (
+                    "division",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="project.Division",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="workordercube",
+            index=models.Index(
+                fields=["domain", "department", "division", "category"],
+                name="project_wor_domain_9c9457_idx",
+            ),
+        ),
+    ]
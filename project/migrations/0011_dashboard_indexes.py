@@ -0,0 +1,114 @@
+# Generated by Django 2.2.28 on 2026-10-18 12:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("project", "0010_cache_generation"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="category",
+            name="text",
+            field=models.CharField(db_index=True, max_length=256),
+        ),
+        migrations.AlterField(
+            model_name="cause",
+            name="text",
+            field=models.CharField(db_index=True, max_length=256),
+        ),
+        migrations.AlterField(
+            model_name="crew",
+            name="text",
+            field=models.CharField(db_index=True, max_length=256),
+        ),
+        migrations.AlterField(
+            model_name="department",
+            name="text",
+            field=models.CharField(db_index=True, max_length=256),
+        ),
+        migrations.AlterField(
+            model_name="division",
+            name="text",
+            field=models.CharField(db_index=True, max_length=256),
+        ),
+        migrations.AlterField(
+            model_name="facility",
+            name="text",
+            field=models.CharField(db_index=True, max_length=256),
+        ),
+        migrations.AlterField(
+            model_name="location",
+            name="text",
+            field=models.CharField(db_index=True, max_length=256),
+        ),
+        migrations.AlterField(
+            model_name="problem",
+            name="text",
+            field=models.CharField(db_index=True, max_length=256),
+        ),
+        migrations.AlterField(
+            model_name="resource",
+            name="text",
+            field=models.CharField(db_index=True, max_length=256),
+        ),
+        migrations.AlterField(
+            model_name="resourcetype",
+            name="text",
+            field=models.CharField(db_index=True, max_length=256),
+        ),
+        migrations.AlterField(
+            model_name="route",
+            name="text",
+            field=models.CharField(db_index=True, max_length=256),
+        ),
+        migrations.AlterField(
+            model_name="task",
+            name="text",
+            field=models.CharField(db_index=True, max_length=256),
+        ),
+        migrations.AlterField(
+            model_name="timecost",
+            name="text",
+            field=models.CharField(db_index=True, max_length=256),
+        ),
+        migrations.AlterField(
+            model_name="unit",
+            name="text",
+            field=models.CharField(db_index=True, max_length=256),
+        ),
+        migrations.AlterField(
+            model_name="workorderstatus",
+            name="text",
+            field=models.CharField(db_index=True, max_length=256),
+        ),
+        migrations.AlterField(
+            model_name="workrequeststatus",
+            name="text",
+            field=models.CharField(db_index=True, max_length=256),
+        ),
+        migrations.AddIndex(
+            model_name="workorder",
+            index=models.Index(
+                fields=[
+                    "department",
+                    "division",
+                    "category",
+                    "total_cost",
+                    "labor_hours",
+                ],
+                name="workorder_dashboard_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="workorder",
+            index=models.Index(fields=["created"], name="workorder_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="workorder",
+            index=models.Index(fields=["updated"], name="workorder_updated_idx"),
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 2.2.28 on 2026-10-18 12:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("project", "0011_dashboard_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WorkOrderRollup",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("period", models.CharField(max_length=8)),
+                ("start", models.DateField()),
+                ("domain", models.CharField(max_length=32)),
+                ("member", models.IntegerField()),
+                ("count", models.IntegerField()),
+                ("total_cost", models.DecimalField(decimal_places=4, max_digits=16)),
+                ("labor_hours", models.DecimalField(decimal_places=4, max_digits=16)),
+                (
+                    "category",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="project.Category",
+                    ),
+                ),
+                (
+                    "department",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="project.Department",
+                    ),
+                ),
+                (
+                    "division",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="project.Division",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="workorderrollup",
+            index=models.Index(
+                fields=["period", "domain", "start"],
+                name="project_wor_period_f08d59_idx",
+            ),
+        ),
+    ]
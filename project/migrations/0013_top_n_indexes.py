@@ -0,0 +1,25 @@
+# Generated by Django 2.2.28 on 2026-10-18 12:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("project", "0012_work_order_rollup"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="workorder",
+            index=models.Index(
+                fields=["department", "total_cost"], name="workorder_dept_cost_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="workorder",
+            index=models.Index(
+                fields=["assigned_crew", "total_cost"], name="workorder_crew_cost_idx"
+            ),
+        ),
+    ]
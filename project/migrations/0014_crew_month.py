@@ -0,0 +1,58 @@
+# Generated by Django 2.2.28 on 2026-10-18 12:08
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("project", "0013_top_n_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CrewMonth",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("crew_code", models.CharField(max_length=64)),
+                ("crew_text", models.CharField(max_length=256)),
+                ("month", models.DateField()),
+                ("orders", models.IntegerField()),
+                ("orders_closed", models.IntegerField()),
+                ("labor_hours", models.DecimalField(decimal_places=4, max_digits=16)),
+                ("total_cost", models.DecimalField(decimal_places=4, max_digits=16)),
+                (
+                    "resource_units",
+                    models.DecimalField(decimal_places=4, max_digits=16),
+                ),
+                ("detail_cost", models.DecimalField(decimal_places=4, max_digits=16)),
+                (
+                    "crew",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="project.Crew",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="crewmonth",
+            index=models.Index(
+                fields=["month", "crew_text"], name="project_cre_month_0a6d7c_idx"
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="crewmonth",
+            unique_together={("crew", "month")},
+        ),
+    ]
@@ -0,0 +1,163 @@
+# Generated by Django 2.2.28 on 2026-10-18 12:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("project", "0014_crew_month"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WorkOrderFact",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("project_code", models.CharField(max_length=64)),
+                ("created", models.DateField()),
+                ("updated", models.DateField()),
+                ("category_code", models.CharField(max_length=64)),
+                ("category_text", models.CharField(max_length=256)),
+                (
+                    "department_code",
+                    models.CharField(blank=True, max_length=64, null=True),
+                ),
+                (
+                    "department_text",
+                    models.CharField(blank=True, max_length=256, null=True),
+                ),
+                (
+                    "division_code",
+                    models.CharField(blank=True, max_length=64, null=True),
+                ),
+                (
+                    "division_text",
+                    models.CharField(blank=True, max_length=256, null=True),
+                ),
+                ("task_text", models.CharField(blank=True, max_length=256, null=True)),
+                ("cause_text", models.CharField(blank=True, max_length=256, null=True)),
+                (
+                    "problem_text",
+                    models.CharField(blank=True, max_length=256, null=True),
+                ),
+                (
+                    "assigned_crew_text",
+                    models.CharField(blank=True, max_length=256, null=True),
+                ),
+                ("total_cost", models.FloatField()),
+                ("labor_hours", models.FloatField()),
+                ("labor_cost", models.FloatField()),
+                ("equipment_cost", models.FloatField()),
+                ("material_cost", models.FloatField()),
+                ("contractor_cost", models.FloatField()),
+                ("misc_cost", models.FloatField()),
+                (
+                    "assigned_crew",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="project.Crew",
+                    ),
+                ),
+                (
+                    "category",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="project.Category",
+                    ),
+                ),
+                (
+                    "cause",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="project.Cause",
+                    ),
+                ),
+                (
+                    "department",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="project.Department",
+                    ),
+                ),
+                (
+                    "division",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="project.Division",
+                    ),
+                ),
+                (
+                    "problem",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="project.Problem",
+                    ),
+                ),
+                (
+                    "project",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="project.Project",
+                    ),
+                ),
+                (
+                    "task",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="project.Task",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="workorderfact",
+            index=models.Index(
+                fields=["department", "division", "category"],
+                name="project_wor_departm_ccd448_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="workorderfact",
+            index=models.Index(
+                fields=["department_text", "total_cost"],
+                name="project_wor_departm_fbcf8d_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="workorderfact",
+            index=models.Index(
+                fields=["assigned_crew_text", "total_cost"],
+                name="project_wor_assigne_3d86f8_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+def merge_duplicate_assets(apps, schema_editor):
+    Asset = apps.get_model("project", "Asset")
+    survivors = {}
+    for asset in Asset.objects.order_by("id"):
+        key = (asset.code, asset.desc1, asset.desc2)
+        if key in survivors:
+            # Point everything at the first copy of the asset and drop the
+            # duplicate so the natural key can be made unique.
+            for rel in Asset._meta.related_objects:
+                rel.related_model.objects.filter(**{rel.field.name: asset.id}).update(
+                    **{rel.field.name: survivors[key]}
+                )
+            asset.delete()
+            continue
+        survivors[key] = asset.id
+
+
+class Migration(migrations.Migration):
+
+    # The natural key is made unique in the next migration, as Postgres
+    # can't ALTER a table with pending deferred foreign key checks from the
+    # deletes in the same transaction.
+    dependencies = [("project", "0015_work_order_fact")]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_assets, migrations.RunPython.noop)
+    ]
@@ -0,0 +1,12 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("project", "0016_merge_duplicate_assets")]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name="asset", unique_together={("code", "desc1", "desc2")}
+        )
+    ]
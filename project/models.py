@@ -1,7 +1,29 @@
+import hashlib
 from django.db import models
 
+ADDRESS_KEY_FIELDS = [
+    "street_number",
+    "street_direction",
+    "street_name",
+    "street_type",
+    "street_suffix",
+    "zipcode",
+    "street2",
+    "other",
+]
+
+
+def address_key(values):
+    # Canonical hash of an address so the same address always maps to a
+    # single row, regardless of spacing or case in the source file.
+    parts = [
+        " ".join(str(values.get(f) or "").split()).upper() for f in ADDRESS_KEY_FIELDS
+    ]
+    return hashlib.sha1("\x1f".join(parts).encode()).hexdigest()
+
 
 class Address(models.Model):
+    key = models.CharField(max_length=40, unique=True)
     street_number = models.CharField(max_length=16)
     street_direction = models.CharField(
         max_length=16, null=False, default="", blank=True
@@ -14,6 +36,11 @@ class Address(models.Model):
     other = models.CharField(max_length=256, null=False, default="", blank=True)
     primary_residence = models.BooleanField(default=False)
 
+    def save(self, *args, **kwargs):
+        if not self.key:
+            self.key = address_key({f: getattr(self, f) for f in ADDRESS_KEY_FIELDS})
+        super().save(*args, **kwargs)
+
     def format(self):
         values = [
             self.street_number,
@@ -33,7 +60,8 @@ class PublicWorksAttributeMixin(models.Model):
         abstract = True
 
     code = models.CharField(max_length=64, unique=True)
-    text = models.CharField(max_length=256)
+    # Charts group by the text.
+    text = models.CharField(max_length=256, db_index=True)
 
     def __str__(self):
         return f"{self.code}: {self.text}"
@@ -108,7 +136,7 @@ class Resource(models.Model):
         unique_together = [("code", "type")]
 
     code = models.CharField(max_length=64)
-    text = models.CharField(max_length=256)
+    text = models.CharField(max_length=256, db_index=True)
     type = models.ForeignKey(
         ResourceType, related_name="resources", on_delete=models.CASCADE
     )
@@ -116,6 +144,9 @@ class Resource(models.Model):
 
 
 class Asset(models.Model):
+    class Meta:
+        unique_together = [("code", "desc1", "desc2")]
+
     code = models.CharField(max_length=64)
     desc1 = models.CharField(max_length=256, blank=True)
     desc2 = models.CharField(max_length=256, blank=True)
@@ -197,6 +228,31 @@ class WorkRequest(models.Model):
 
 
 class WorkOrder(models.Model):
+    class Meta:
+        indexes = [
+            # Serves the dashboard's department/division/category filters
+            # and covers the charted measures.
+            models.Index(
+                fields=[
+                    "department",
+                    "division",
+                    "category",
+                    "total_cost",
+                    "labor_hours",
+                ],
+                name="workorder_dashboard_idx",
+            ),
+            # Rank orders by cost within a department or crew.
+            models.Index(
+                fields=["department", "total_cost"], name="workorder_dept_cost_idx"
+            ),
+            models.Index(
+                fields=["assigned_crew", "total_cost"], name="workorder_crew_cost_idx"
+            ),
+            models.Index(fields=["created"], name="workorder_created_idx"),
+            models.Index(fields=["updated"], name="workorder_updated_idx"),
+        ]
+
     project = models.ForeignKey(
         Project, related_name="work_orders", on_delete=models.CASCADE, unique=True
     )
@@ -356,3 +412,169 @@ class WorkDetail(models.Model):
         null=True,
         blank=True,
     )
+
+
+class ImportFingerprint(models.Model):
+    """
+    The hash of the source rows last imported for a project, used to skip
+    unchanged rows on incremental imports.
+    """
+
+    class Meta:
+        unique_together = [("kind", "project")]
+
+    kind = models.CharField(max_length=16)
+    project = models.ForeignKey(
+        Project, related_name="fingerprints", on_delete=models.CASCADE
+    )
+    digest = models.CharField(max_length=40)
+    status_date = models.DateField(null=True, blank=True)
+
+
+class WorkOrderCube(models.Model):
+    """
+    Pre-aggregated work order measures for the dashboard, one row per value
+    of a domain within a (department, division, category) partition.
+    Maintained by ``project.cube``.
+    """
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["domain", "department", "division", "category"])
+        ]
+
+    domain = models.CharField(max_length=32)
+    # The id of the domain's attribute, e.g. the Task for "task__text".
+    member = models.IntegerField()
+    department = models.ForeignKey(
+        Department, related_name="+", on_delete=models.CASCADE, null=True, blank=True
+    )
+    division = models.ForeignKey(
+        Division, related_name="+", on_delete=models.CASCADE, null=True, blank=True
+    )
+    category = models.ForeignKey(Category, related_name="+", on_delete=models.CASCADE)
+    count = models.IntegerField()
+    total_cost_sum = models.FloatField()
+    total_cost_sum_squares = models.FloatField()
+    total_cost_sketch = models.TextField()
+    labor_hours_sum = models.FloatField()
+    labor_hours_sum_squares = models.FloatField()
+    labor_hours_sketch = models.TextField()
+
+
+class CacheGeneration(models.Model):
+    """
+    A counter bumped after every import. Cached responses are keyed on it,
+    so bumping it invalidates them in every process at once.
+    """
+
+    name = models.CharField(max_length=32, unique=True)
+    value = models.IntegerField(default=0)
+
+
+class WorkOrderRollup(models.Model):
+    """
+    Work order totals per month or week for each value of a domain within
+    a (department, division, category) partition. Maintained by
+    ``project.rollup``.
+    """
+
+    class Meta:
+        indexes = [models.Index(fields=["period", "domain", "start"])]
+
+    period = models.CharField(max_length=8)
+    # The first day of the month or the Monday of the week.
+    start = models.DateField()
+    domain = models.CharField(max_length=32)
+    member = models.IntegerField()
+    department = models.ForeignKey(
+        Department, related_name="+", on_delete=models.CASCADE, null=True, blank=True
+    )
+    division = models.ForeignKey(
+        Division, related_name="+", on_delete=models.CASCADE, null=True, blank=True
+    )
+    category = models.ForeignKey(Category, related_name="+", on_delete=models.CASCADE)
+    count = models.IntegerField()
+    total_cost = models.DecimalField(max_digits=16, decimal_places=4)
+    labor_hours = models.DecimalField(max_digits=16, decimal_places=4)
+
+
+class CrewMonth(models.Model):
+    """
+    Productivity of a crew in a month, from the work orders assigned to it
+    that were created in the month and their details. The crew's code and
+    text are copied so the table can be read without joins. Maintained by
+    ``project.productivity``.
+    """
+
+    class Meta:
+        unique_together = [("crew", "month")]
+        indexes = [models.Index(fields=["month", "crew_text"])]
+
+    crew = models.ForeignKey(Crew, related_name="+", on_delete=models.CASCADE)
+    crew_code = models.CharField(max_length=64)
+    crew_text = models.CharField(max_length=256)
+    month = models.DateField()
+    orders = models.IntegerField()
+    orders_closed = models.IntegerField()
+    labor_hours = models.DecimalField(max_digits=16, decimal_places=4)
+    total_cost = models.DecimalField(max_digits=16, decimal_places=4)
+    resource_units = models.DecimalField(max_digits=16, decimal_places=4)
+    detail_cost = models.DecimalField(max_digits=16, decimal_places=4)
+
+
+class WorkOrderFact(models.Model):
+    """
+    A work order with the texts of its dimensions inlined and its measures
+    as floats, so dashboard reads don't join. Maintained by
+    ``project.facts``.
+    """
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["department", "division", "category"]),
+            # Rank orders by cost within a department or crew.
+            models.Index(fields=["department_text", "total_cost"]),
+            models.Index(fields=["assigned_crew_text", "total_cost"]),
+        ]
+
+    project = models.OneToOneField(Project, related_name="+", on_delete=models.CASCADE)
+    project_code = models.CharField(max_length=64)
+    created = models.DateField()
+    updated = models.DateField()
+    category = models.ForeignKey(Category, related_name="+", on_delete=models.CASCADE)
+    category_code = models.CharField(max_length=64)
+    category_text = models.CharField(max_length=256)
+    department = models.ForeignKey(
+        Department, related_name="+", on_delete=models.CASCADE, null=True, blank=True
+    )
+    department_code = models.CharField(max_length=64, null=True, blank=True)
+    department_text = models.CharField(max_length=256, null=True, blank=True)
+    division = models.ForeignKey(
+        Division, related_name="+", on_delete=models.CASCADE, null=True, blank=True
+    )
+    division_code = models.CharField(max_length=64, null=True, blank=True)
+    division_text = models.CharField(max_length=256, null=True, blank=True)
+    task = models.ForeignKey(
+        Task, related_name="+", on_delete=models.CASCADE, null=True, blank=True
+    )
+    task_text = models.CharField(max_length=256, null=True, blank=True)
+    cause = models.ForeignKey(
+        Cause, related_name="+", on_delete=models.CASCADE, null=True, blank=True
+    )
+    cause_text = models.CharField(max_length=256, null=True, blank=True)
+    problem = models.ForeignKey(
+        Problem, related_name="+", on_delete=models.CASCADE, null=True, blank=True
+    )
+    problem_text = models.CharField(max_length=256, null=True, blank=True)
+    assigned_crew = models.ForeignKey(
+        Crew, related_name="+", on_delete=models.CASCADE, null=True, blank=True
+    )
+    assigned_crew_text = models.CharField(max_length=256, null=True, blank=True)
+    total_cost = models.FloatField()
+    labor_hours = models.FloatField()
+    labor_cost = models.FloatField()
+    equipment_cost = models.FloatField()
+    material_cost = models.FloatField()
+    contractor_cost = models.FloatField()
+    misc_cost = models.FloatField()
@@ -0,0 +1,113 @@
+"""
+Crew productivity per month.
+
+Work orders are attributed to their assigned crew and to the month they were
+created in. Each crew month holds the number of orders and how many of them
+are closed (have an end date), their labor hours and total cost, and the
+resource units and cost of their work details. The details are joined to
+the orders once, when the crew months are rebuilt after an import, so
+reading them never joins WorkOrder or WorkDetail.
+"""
+
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+
+from . import models
+from .reader import chunked
+
+BATCH_SIZE = 500
+
+FIELDS = [
+    "crew_code",
+    "crew_text",
+    "month",
+    "orders",
+    "orders_closed",
+    "labor_hours",
+    "total_cost",
+    "resource_units",
+    "detail_cost",
+]
+
+
+def affected_crews(codes):
+    """The crews assigned to the work orders of the given projects."""
+    crews = set()
+    for chunk in chunked(codes, BATCH_SIZE):
+        crews.update(
+            models.WorkOrder.objects.filter(
+                project__code__in=chunk, assigned_crew__isnull=False
+            ).values_list("assigned_crew_id", flat=True)
+        )
+    return crews
+
+
+def build_crew_months(orders):
+    details = {
+        project: (units or Decimal(0), cost or Decimal(0))
+        for project, units, cost in models.WorkDetail.objects.filter(
+            project__work_orders__in=orders
+        )
+        .values("project_id")
+        .annotate(units=Sum("total_units"), cost=Sum("grand_total_cost"))
+        .values_list("project_id", "units", "cost")
+    }
+    months = defaultdict(lambda: [0, 0] + [Decimal(0)] * 4)
+    for crew, project, created, end, hours, cost in orders.values_list(
+        "assigned_crew_id", "project_id", "created", "end", "labor_hours", "total_cost"
+    ).iterator():
+        month = months[crew, created.replace(day=1)]
+        units, detail_cost = details.get(project, (0, 0))
+        month[0] += 1
+        month[1] += end is not None
+        month[2] += hours
+        month[3] += cost
+        month[4] += units
+        month[5] += detail_cost
+    crews = models.Crew.objects.in_bulk({crew for crew, _ in months})
+    for (crew, month), values in months.items():
+        yield models.CrewMonth(
+            crew_id=crew,
+            crew_code=crews[crew].code,
+            crew_text=crews[crew].text,
+            month=month,
+            **dict(zip(FIELDS[3:], values)),
+        )
+
+
+@transaction.atomic
+def refresh_crew_months(crews=None):
+    """
+    Rebuild the months of the given crews, or of every crew when no crews
+    are given.
+    """
+    if crews is None:
+        models.CrewMonth.objects.all().delete()
+        batches = [models.WorkOrder.objects.filter(assigned_crew__isnull=False)]
+    else:
+        batches = []
+        for chunk in chunked(crews, BATCH_SIZE):
+            models.CrewMonth.objects.filter(crew__in=chunk).delete()
+            batches.append(models.WorkOrder.objects.filter(assigned_crew__in=chunk))
+    for orders in batches:
+        models.CrewMonth.objects.bulk_create(
+            build_crew_months(orders), batch_size=BATCH_SIZE
+        )
+
+
+def crew_months(crew=None, start=None, end=None):
+    """
+    The crew months, latest first, optionally for a single crew code and
+    from ``start`` up to and including ``end``.
+    """
+    months = models.CrewMonth.objects.order_by("-month", "crew_text")
+    if crew:
+        months = months.filter(crew_code=crew)
+    if start:
+        months = months.filter(month__gte=start)
+    if end:
+        months = months.filter(month__lte=end)
+    return months.values(*FIELDS)
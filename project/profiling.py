@@ -0,0 +1,174 @@
+"""
+Import profiling.
+
+``profile`` measures a whole import run and ``stage`` the steps inside it:
+the loaders wrap reading, normalizing, resolving and writing in stages,
+which nest into dotted names such as "orders.write.addresses". Each stage
+records its calls, wall and CPU time, the queries run while it was the
+innermost stage, and the rows it handled. The run's report adds the total
+queries and the peak memory, and is plain data ready to be dumped as JSON.
+
+Every import writes its report, by default to the IMPORT_PROFILE_REPORT
+setting. Stages are no-ops outside of ``profile``. Only the current process is
+measured, except for CPU time and peak memory, which include the worker
+processes the importer waited for.
+"""
+
+import cProfile
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import connection
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+_active = []
+
+
+def cpu_time():
+    """CPU seconds of this process and of its finished child processes."""
+    seconds = time.process_time()
+    if resource is not None:
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        seconds += children.ru_utime + children.ru_stime
+    return seconds
+
+
+def peak_memory():
+    """Peak resident memory in KiB of this process and of its largest child."""
+    if resource is None:
+        return None
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    }
+
+
+class ImportProfile:
+    def __init__(self, name):
+        self.name = name
+        self.stack = []
+        self.stages = {}
+        self.queries = 0
+
+    def count_query(self, execute, sql, params, many, context):
+        self.queries += 1
+        if self.stack:
+            self.stages[self.stack[-1]]["queries"] += 1
+        return execute(sql, params, many, context)
+
+    @contextmanager
+    def stage(self, name, rows=0):
+        path = ".".join([self.stack[-1], name]) if self.stack else name
+        totals = self.stages.setdefault(
+            path, {"calls": 0, "wall": 0.0, "cpu": 0.0, "queries": 0, "rows": 0}
+        )
+        self.stack.append(path)
+        wall, cpu = time.perf_counter(), cpu_time()
+        try:
+            yield
+        finally:
+            totals["calls"] += 1
+            totals["wall"] += time.perf_counter() - wall
+            totals["cpu"] += cpu_time() - cpu
+            totals["rows"] += rows
+            self.stack.pop()
+
+    def report(self, wall, cpu):
+        stages = []
+        for name, totals in self.stages.items():
+            rows_per_sec = None
+            if totals["rows"] and totals["wall"]:
+                rows_per_sec = round(totals["rows"] / totals["wall"], 1)
+            stages.append(
+                dict(
+                    totals,
+                    name=name,
+                    wall=round(totals["wall"], 6),
+                    cpu=round(totals["cpu"], 6),
+                    rows_per_sec=rows_per_sec,
+                )
+            )
+        return {
+            "name": self.name,
+            "finished": datetime.now(timezone.utc).isoformat(),
+            "wall": round(wall, 6),
+            "cpu": round(cpu, 6),
+            "queries": self.queries,
+            "peak_memory_kib": peak_memory(),
+            "stages": stages,
+        }
+
+
+@contextmanager
+def profile(name="import", cprofile_path=None):
+    """
+    Profile the enclosed import run. The yielded dict receives the run's
+    report on exit; when ``cprofile_path`` is given the run is also traced
+    with cProfile and the stats are dumped there.
+    """
+    result = {}
+    run = ImportProfile(name)
+    profiler = cProfile.Profile() if cprofile_path else None
+    _active.append(run)
+    wall, cpu = time.perf_counter(), cpu_time()
+    try:
+        with connection.execute_wrapper(run.count_query):
+            if profiler:
+                profiler.enable()
+            try:
+                yield result
+            finally:
+                if profiler:
+                    profiler.disable()
+    finally:
+        _active.remove(run)
+        result.update(run.report(time.perf_counter() - wall, cpu_time() - cpu))
+        if profiler:
+            profiler.dump_stats(cprofile_path)
+
+
+def write_report(report, path=None):
+    """Write a run's report as JSON to ``path`` or IMPORT_PROFILE_REPORT."""
+    with open(path or settings.IMPORT_PROFILE_REPORT, "w") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+
+@contextmanager
+def stage(name, rows=0):
+    """Time the enclosed step of the active import run, if there is one."""
+    if not _active:
+        yield
+        return
+    with _active[-1].stage(name, rows):
+        yield
+
+
+def add_rows(count):
+    """Count rows the current stage handled that weren't known up front."""
+    if _active and _active[-1].stack:
+        run = _active[-1]
+        run.stages[run.stack[-1]]["rows"] += count
+
+
+def timed(name, chunks):
+    """
+    Iterate over ``chunks`` timing each step under the stage ``name``, for
+    lazily read input, and counting the items of the chunks as its rows.
+    """
+    chunks = iter(chunks)
+    while True:
+        with stage(name):
+            chunk = next(chunks, None)
+            if chunk is not None:
+                add_rows(len(chunk))
+        if chunk is None:
+            return
+        yield chunk
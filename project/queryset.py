@@ -1,8 +1,23 @@
 from django.db.models import Aggregate, FloatField
 
 
-class Median(Aggregate):
+class Percentile(Aggregate):
+    """
+    The exact continuous percentile of the expression, e.g.
+    ``Percentile("total_cost", 0.9)`` for the 90th percentile.
+    """
+
     function = "PERCENTILE_CONT"
-    name = "median"
+    name = "percentile"
     output_field = FloatField()
-    template = "%(function)s(0.5) WITHIN GROUP (ORDER BY %(expressions)s)"
+    template = "%(function)s(%(percentile)s) WITHIN GROUP (ORDER BY %(expressions)s)"
+
+    def __init__(self, expression, percentile, **extra):
+        super().__init__(expression, percentile=float(percentile), **extra)
+
+
+class Median(Percentile):
+    name = "median"
+
+    def __init__(self, expression, **extra):
+        super().__init__(expression, 0.5, **extra)
@@ -0,0 +1,86 @@
+"""
+Streaming reader for the CSV exports.
+
+``csv.DictReader`` builds a dict holding every column of every row. The
+loaders only use a fraction of the columns, so rows are instead projected
+to the columns a loader asks for and stored as a tuple on a ``__slots__``
+record, which still supports ``row["Column"]`` and ``row.get("Column")``.
+Rows are produced lazily, so memory use doesn't depend on the size of the
+file. Paths ending in ``.gz`` are decompressed on the fly.
+"""
+
+import csv
+import gzip
+
+
+class Row:
+    __slots__ = ("values",)
+
+    # Column name to index in values, set on the subclass made per file.
+    columns = {}
+
+    def __init__(self, values):
+        self.values = values
+
+    def __getitem__(self, column):
+        return self.values[self.columns[column]]
+
+    def __contains__(self, column):
+        return column in self.columns
+
+    def get(self, column, default=None):
+        index = self.columns.get(column)
+        return default if index is None else self.values[index]
+
+
+def is_compressed(path):
+    return str(path).endswith(".gz")
+
+
+def open_csv(path):
+    if is_compressed(path):
+        return gzip.open(path, mode="rt", newline="")
+    return open(path, mode="r", newline="")
+
+
+def project_rows(lines, columns, fieldnames=None):
+    """
+    Yield the rows of ``lines`` projected to ``columns``. Columns missing
+    from the file are left out, so ``row.get`` returns None for them as it
+    would for a dict. The header is read from ``lines`` unless
+    ``fieldnames`` is given.
+    """
+    reader = csv.reader(lines)
+    if fieldnames is None:
+        fieldnames = next(reader, [])
+    positions = {name: i for i, name in enumerate(fieldnames)}
+    present = [c for c in dict.fromkeys(columns) if c in positions]
+    indexes = [positions[c] for c in present]
+    record = type(
+        "Row",
+        (Row,),
+        {"__slots__": (), "columns": {c: i for i, c in enumerate(present)}},
+    )
+    for values in reader:
+        if values:
+            yield record(tuple([values[i] for i in indexes]))
+
+
+def read_rows(path, columns):
+    with open_csv(path) as f:
+        yield from project_rows(f, columns)
+
+
+def chunked(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def read_batches(path, columns, size):
+    return chunked(read_rows(path, columns), size)
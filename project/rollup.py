@@ -0,0 +1,145 @@
+"""
+Monthly and weekly work order rollups for the time-series charts.
+
+Orders are bucketed by their created date into one row per period, domain
+value and (department, division, category) partition, so a multi-year
+series reads a few hundred rollup rows instead of every order. The rollups
+are rebuilt per partition alongside the cube after each order import.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connection
+
+from . import cube, models
+
+PERIODS = ["month", "week"]
+
+MEASURES = ["count", "total_cost", "labor_hours"]
+
+TOP_SQL = """
+SELECT start, label, count, total_cost, labor_hours FROM (
+    SELECT
+        r.start,
+        a.text AS label,
+        SUM(r.count) AS count,
+        SUM(r.total_cost) AS total_cost,
+        SUM(r.labor_hours) AS labor_hours,
+        ROW_NUMBER() OVER (
+            PARTITION BY r.start
+            ORDER BY SUM(r.{measure}) DESC, a.text
+        ) AS rank
+    FROM {table} r
+    INNER JOIN {domain_table} a ON a.id = r.member
+    WHERE {where}
+    GROUP BY r.start, a.text
+) ranked
+WHERE rank <= %s
+ORDER BY start, rank
+"""
+
+
+def period_start(period, day):
+    if period == "month":
+        return day.replace(day=1)
+    return day - timedelta(days=day.weekday())
+
+
+def build_rollups(orders):
+    fields = [cube.domain_field(d) + "_id" for d in cube.DOMAINS]
+    rollups = {}
+    rows = orders.values_list(
+        "created", *cube.PARTITION_FIELDS, "total_cost", "labor_hours", *fields
+    )
+    for row in rows.iterator():
+        created, partition, members = row[0], row[1:4], row[6:]
+        cost, hours = row[4:6]
+        for period in PERIODS:
+            start = period_start(period, created)
+            for domain, member in zip(cube.DOMAINS, members):
+                if member is None:
+                    continue
+                key = (period, start, domain, member) + partition
+                totals = rollups.setdefault(key, [0, Decimal(0), Decimal(0)])
+                totals[0] += 1
+                totals[1] += cost
+                totals[2] += hours
+    for key, (count, cost, hours) in rollups.items():
+        period, start, domain, member, department, division, category = key
+        yield models.WorkOrderRollup(
+            period=period,
+            start=start,
+            domain=domain,
+            member=member,
+            department_id=department,
+            division_id=division,
+            category_id=category,
+            count=count,
+            total_cost=cost,
+            labor_hours=hours,
+        )
+
+
+def refresh_rollups(partitions=None):
+    cube.rebuild(models.WorkOrderRollup, build_rollups, partitions)
+
+
+def top_per_period(
+    period,
+    domain,
+    measure="total_cost",
+    limit=5,
+    department=None,
+    division=None,
+    category=None,
+):
+    """
+    The ``limit`` labels of ``domain`` with the highest ``measure`` in each
+    period, as (start, label, count, total_cost, labor_hours) rows ordered
+    by period and rank. Domain values sharing a text are combined, as in
+    ``project.analyze.analyze``.
+    """
+    if measure not in MEASURES:
+        raise ValueError(f"Unknown measure {measure!r}")
+    where = ["r.period = %s", "r.domain = %s"]
+    params = [period, domain]
+    for field, value in [
+        ("department_id", department),
+        ("division_id", division),
+        ("category_id", category),
+    ]:
+        if value is not None:
+            where.append(f"r.{field} = %s")
+            params.append(value.pk)
+    model = models.WorkOrder._meta.get_field(cube.domain_field(domain)).related_model
+    sql = TOP_SQL.format(
+        measure=measure,
+        table=models.WorkOrderRollup._meta.db_table,
+        domain_table=model._meta.db_table,
+        where=" AND ".join(where),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params + [limit])
+        return cursor.fetchall()
+
+
+def timeseries(period, domain, measure="total_cost", limit=5, **filters):
+    """
+    The top labels of every period as one series per label, with None for
+    the periods where a label isn't in the top ``limit``.
+    """
+    rows = top_per_period(period, domain, measure, limit, **filters)
+    starts = sorted({row[0] for row in rows})
+    index = {start: i for i, start in enumerate(starts)}
+    series = {}
+    for start, label, *values in rows:
+        if label not in series:
+            series[label] = {m: [None] * len(starts) for m in MEASURES}
+        for m, value in zip(MEASURES, values):
+            series[label][m][index[start]] = value
+    return {
+        "period": period,
+        "starts": starts,
+        "series": [{"label": label, **values} for label, values in series.items()],
+    }
@@ -0,0 +1,90 @@
+"""
+Mergeable quantile sketch.
+
+A t-digest keeps a sorted list of (mean, weight) centroids. Centroids near
+the tails stay small and centroids near the median grow, so a digest of any
+number of values fits in roughly ``COMPRESSION`` centroids while quantiles
+stay accurate. Two digests merge into the digest of the combined values,
+which lets the cube store one digest per cell and combine cells at query
+time. Equal values share a centroid, so while a digest holds fewer distinct
+values than ``COMPRESSION`` its quantiles match ``PERCENTILE_CONT`` exactly.
+"""
+
+import json
+
+COMPRESSION = 100
+
+
+class TDigest:
+    def __init__(self, centroids=()):
+        # Sorted [mean, weight] pairs.
+        self.centroids = [list(c) for c in centroids]
+
+    @classmethod
+    def from_values(cls, values):
+        digest = cls([[float(v), 1] for v in sorted(values)])
+        digest.compress()
+        return digest
+
+    @classmethod
+    def loads(cls, data):
+        return cls(json.loads(data) if data else ())
+
+    def dumps(self):
+        return json.dumps(self.centroids, separators=(",", ":"))
+
+    @property
+    def count(self):
+        return sum(weight for _, weight in self.centroids)
+
+    def merge(self, other):
+        self.centroids = sorted(self.centroids + other.centroids)
+        self.compress()
+        return self
+
+    def compress(self, compression=COMPRESSION):
+        if not self.centroids:
+            return
+        total = self.count
+        # Merged digests repeat values, so count the distinct ones: a digest
+        # of fewer distinct values than the compression is kept exact.
+        means = [mean for mean, _ in self.centroids]
+        bounded = 1 + sum(a != b for a, b in zip(means, means[1:])) > compression
+        merged = [self.centroids[0][:]]
+        seen = 0
+        for mean, weight in self.centroids[1:]:
+            last = merged[-1]
+            combined = last[1] + weight
+            q = (seen + combined / 2) / total
+            # Equal values always merge, which keeps ties exact.
+            if mean == last[0] or (
+                bounded and combined <= max(1, 4 * total * q * (1 - q) / compression)
+            ):
+                last[0] += (mean - last[0]) * weight / combined
+                last[1] = combined
+            else:
+                seen += last[1]
+                merged.append([mean, weight])
+        self.centroids = merged
+
+    def quantile(self, q):
+        """
+        The value at quantile ``q``. A centroid stands for the ranks it
+        covers; between centroids the value is interpolated linearly, which
+        matches ``PERCENTILE_CONT`` while no distinct values share a centroid.
+        """
+        if not self.centroids:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        previous = None
+        for mean, weight in self.centroids:
+            if rank < seen:
+                # Between the last rank of the previous centroid and the
+                # first rank of this one.
+                return previous + (mean - previous) * (rank - seen + 1)
+            seen += weight
+            if rank <= seen - 1:
+                return mean
+            previous = mean
+        return previous
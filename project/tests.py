@@ -0,0 +1,278 @@
+import csv
+import io
+import os
+import random
+import tempfile
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase
+
+from . import clean, dates, importer, models, reader
+from .sketch import TDigest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def strptime_fields(value, formats):
+    d = dates.strptime(value, formats)
+    return (d.year, d.month, d.day, d.hour, d.minute, d.second)
+
+
+class DateParsingTests(SimpleTestCase):
+    valid = [
+        "1/2/2018",
+        "01/02/2018",
+        "12/31/2019 23:59",
+        "2/29/2020 1:02:03",
+        "6/28/2018 0:00:00",
+        "1/2/2018 1:2",
+    ]
+    invalid = [
+        "",
+        "abc",
+        "2/30/2019",
+        "13/1/2019",
+        "0/1/2018",
+        "1/1/19",
+        "1/2/02018",
+        "001/2/2018",
+        "+1/2/2018",
+        "1_0/2/2018",
+        " 1/2/2018",
+        "1/2/2018 ",
+        "1/2/2018 1",
+        "1/2/2018 25:00",
+        "1/2/2018 1:02:03.5",
+        "1/2/2018 1:02:03:04",
+    ]
+
+    def assertMatchesStrptime(self, value, require_time):
+        formats = dates.DATETIME_FORMATS if require_time else dates.DATE_FORMATS
+        try:
+            expected = strptime_fields(value, formats)
+        except ValueError:
+            with self.assertRaises(ValueError):
+                dates.split_datetime(value, require_time)
+        else:
+            self.assertEqual(dates.split_datetime(value, require_time), expected)
+
+    def test_split_datetime_matches_strptime(self):
+        for value in self.valid + self.invalid:
+            for require_time in (False, True):
+                with self.subTest(value=value, require_time=require_time):
+                    self.assertMatchesStrptime(value, require_time)
+
+    def test_split_datetime_matches_strptime_on_mangled_values(self):
+        rng = random.Random(0)
+        alphabet = "0123456789/: +-_."
+        for _ in range(2000):
+            value = list(rng.choice(self.valid))
+            for _ in range(rng.randint(1, 2)):
+                i = rng.randrange(len(value))
+                if rng.random() < 0.5:
+                    value.insert(i, rng.choice(alphabet))
+                else:
+                    value[i] = rng.choice(alphabet)
+            value = "".join(value)
+            for require_time in (False, True):
+                with self.subTest(value=value, require_time=require_time):
+                    self.assertMatchesStrptime(value, require_time)
+
+    def test_parse_date(self):
+        for value in self.valid:
+            with self.subTest(value=value):
+                expected = dates.strptime(value, dates.DATE_FORMATS).date()
+                self.assertEqual(dates.parse_date(value), expected)
+        self.assertIsNone(dates.parse_date(""))
+        for value in self.invalid[1:]:
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                dates.parse_date(value)
+
+
+QUANTILES = [0, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1]
+
+
+@skipUnless(np, "numpy isn't installed")
+class PercentileTests(SimpleTestCase):
+    def test_tdigest_is_exact_for_few_distinct_values(self):
+        rng = random.Random(0)
+        values = [rng.choice(range(50)) * 1.5 for _ in range(5000)]
+        digest = TDigest.from_values(values)
+        for q in QUANTILES:
+            with self.subTest(q=q):
+                self.assertAlmostEqual(
+                    digest.quantile(q), np.percentile(values, q * 100)
+                )
+
+    def test_tdigest_merge_is_exact_for_few_distinct_values(self):
+        rng = random.Random(1)
+        parts = [[rng.randrange(80) for _ in range(300)] for _ in range(5)]
+        digest = TDigest()
+        for part in parts:
+            digest.merge(TDigest.from_values(part))
+        values = [v for part in parts for v in part]
+        for q in QUANTILES:
+            with self.subTest(q=q):
+                self.assertAlmostEqual(
+                    digest.quantile(q), np.percentile(values, q * 100)
+                )
+
+    def test_tdigest_approximates_many_distinct_values(self):
+        rng = random.Random(2)
+        values = np.array([rng.lognormvariate(5, 1) for _ in range(20000)])
+        digest = TDigest()
+        for chunk in np.array_split(values, 20):
+            digest.merge(TDigest.from_values(chunk))
+        ordered = np.sort(values)
+        for q in QUANTILES:
+            with self.subTest(q=q):
+                estimate = digest.quantile(q)
+                # Compare ranks, as the values of the tails are far apart.
+                rank = np.searchsorted(ordered, estimate) / len(values)
+                self.assertAlmostEqual(rank, q, delta=0.01)
+
+    def test_columnar_percentiles_match_numpy(self):
+        from .columnar import ColumnTable
+
+        rng = np.random.default_rng(0)
+        groups = rng.integers(0, 6, size=1000)
+        # Group 3 has no values.
+        groups[groups == 3] = 4
+        values = rng.gamma(2, 100, size=1000)
+        counts = np.bincount(groups, minlength=7)
+        table = ColumnTable([])
+        for stat, q in [("median", 0.5), ("p10", 0.1), ("p90", 0.9), ("p99", 0.99)]:
+            result = table.summarize(stat, groups, values, counts)
+            for group in np.flatnonzero(counts):
+                with self.subTest(stat=stat, group=group):
+                    self.assertAlmostEqual(
+                        result[group], np.percentile(values[groups == group], q * 100)
+                    )
+
+
+TESTDATA = os.path.join(os.path.dirname(__file__), "testdata")
+
+PATHS = {
+    kind: os.path.join(TESTDATA, os.path.basename(path))
+    for kind, (path, _, _) in importer.LOADERS.items()
+}
+
+
+def imported_rows():
+    return {
+        "requests": sorted(
+            models.WorkRequest.objects.values_list(
+                "project__code", "received", "status__code", "address__key"
+            )
+        ),
+        "orders": sorted(
+            models.WorkOrder.objects.values_list(
+                "project__code",
+                "created",
+                "start",
+                "end",
+                "total_cost",
+                "asset__code",
+                "assigned_crew__code",
+                "address__key",
+            )
+        ),
+        "details": sorted(
+            models.WorkDetail.objects.values_list(
+                "project__code",
+                "created",
+                "task__code",
+                "resource__code",
+                "resource__default_unit_cost",
+                "resource_desc",
+                "units",
+                "grand_total_cost",
+            )
+        ),
+    }
+
+
+class ImportTests(TestCase):
+    def run_import(self, workers=1, incremental=False, paths=PATHS):
+        # Small chunks, so the files are split into several byte ranges.
+        with mock.patch.object(importer, "CHUNK_BYTES", 1000):
+            return importer.run_import(
+                workers=workers, incremental=incremental, paths=paths
+            )
+
+    def test_split_file_keeps_quoted_newlines(self):
+        path = PATHS["details"]
+        expected = [r.values for r in reader.read_rows(path, clean.DETAIL_COLUMNS)]
+        for size in [1, 500, 1000, 100000]:
+            fieldnames, ranges = importer.split_file(path, size)
+            rows = []
+            with open(path, mode="rb") as f:
+                for start, end in ranges:
+                    f.seek(start)
+                    data = io.StringIO(f.read(end - start).decode())
+                    rows += [
+                        r.values
+                        for r in reader.project_rows(
+                            data, clean.DETAIL_COLUMNS, fieldnames
+                        )
+                    ]
+            with self.subTest(size=size):
+                self.assertEqual(rows, expected)
+
+    def test_workers_write_the_same_rows(self):
+        results = []
+        for workers in [1, 2]:
+            with transaction.atomic():
+                self.run_import(workers)
+                results.append(imported_rows())
+                transaction.set_rollback(True)
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(len(results[0]["details"]), 58)
+        self.assertIn(
+            'Pole 12, "north"\nreplaced after storm',
+            [row[5] for row in results[0]["details"]],
+        )
+
+    def test_full_reimport_replaces_details(self):
+        self.run_import()
+        rows = imported_rows()
+        counts = self.run_import()
+        self.assertEqual(counts["details"]["written"], 58)
+        self.assertEqual(models.WorkDetail.objects.count(), 58)
+        self.assertEqual(imported_rows(), rows)
+
+    def test_unchanged_incremental_import_writes_nothing(self):
+        self.run_import()
+        rows = imported_rows()
+        counts = self.run_import(incremental=True)
+        for kind, count in counts.items():
+            with self.subTest(kind=kind):
+                self.assertEqual(count["written"], 0)
+                self.assertEqual(count["new"] + count["changed"], 0)
+        self.assertEqual(imported_rows(), rows)
+
+    def test_incremental_import_keeps_the_latest_resource_row(self):
+        self.run_import()
+        resource = models.Resource.objects.get(code="1", type__code="1")
+        self.assertEqual(resource.default_unit_cost, Decimal("74.2"))
+        # Change an older row of the resource, in another project.
+        with open(PATHS["details"], newline="") as f:
+            rows = list(csv.DictReader(f))
+        for row in rows:
+            if row["Work Order Number"] == "18-000109" and row["Resource"] == "1":
+                row["Additional Description"] = "changed"
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "work_order_detail.csv")
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+                writer.writeheader()
+                writer.writerows(rows)
+            counts = self.run_import(incremental=True, paths={"details": path})
+        self.assertEqual(counts["details"]["changed"], 1)
+        resource.refresh_from_db()
+        self.assertEqual(resource.default_unit_cost, Decimal("74.2"))
@@ -5,4 +5,9 @@ app_name = "project"
 urlpatterns = [
     path("", views.DashboardView.as_view(), name="dashboard"),
     path("data/", views.chart_data, name="chart_data"),
+    path("data/timeseries/", views.timeseries_data, name="timeseries_data"),
+    path("data/top/", views.top_orders, name="top_orders"),
+    path("data/crews/", views.crew_data, name="crew_data"),
+    path("data/options/", views.filter_options, name="filter_options"),
+    path("data/cache/", views.cache_stats, name="cache_stats"),
 ]
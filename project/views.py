@@ -1,10 +1,14 @@
 import random
+from django.conf import settings
+from django.core.paginator import Paginator
 from django.views.generic import TemplateView
 from django.shortcuts import get_object_or_404
-from django.http import JsonResponse
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils.dateparse import parse_date
+from django.http import HttpResponseBadRequest, JsonResponse
 
-from . import models
-from .analyze import analyze
+from . import cache, columnar, cube, facts, models, productivity, rollup
+from .analyze import analyze, percentile_of, top_n_per_group
 
 
 class DashboardView(TemplateView):
@@ -12,19 +16,12 @@ class DashboardView(TemplateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        options = facts.options()
         context.update(
             {
-                "departments": models.Department.objects.filter(
-                    work_orders__isnull=False
-                )
-                .distinct()
-                .order_by("text"),
-                "divisions": models.Division.objects.filter(work_orders__isnull=False)
-                .distinct()
-                .order_by("text"),
-                "categories": models.Category.objects.filter(work_orders__isnull=False)
-                .distinct()
-                .order_by("text"),
+                "departments": options["department"],
+                "divisions": options["division"],
+                "categories": options["category"],
             }
         )
         return context
@@ -34,6 +31,7 @@ def random_color():
     return "#" + "".join([random.choice("0123456789ABCDEF") for j in range(6)])
 
 
+@cache.cached_json
 def chart_data(request):
     dept = (
         None
@@ -55,18 +53,44 @@ def chart_data(request):
     range = request.GET["range"]
     value = request.GET["value"]
 
-    queryset = models.WorkOrder.objects.all()
-    if dept:
-        queryset = queryset.filter(department=dept)
-    if div:
-        queryset = queryset.filter(division=div)
-    if cat:
-        queryset = queryset.filter(category=cat)
-    data = list(
-        analyze(queryset, domain=domain, range=range).order_by(f"-{range}_{value}")[
-            :limit
-        ]
+    # The cube's percentiles are approximate, so exact mode computes them
+    # from the orders.
+    approximate = (
+        percentile_of(value) is None or settings.PERCENTILE_MODE == "approximate"
     )
+    engine = settings.ANALYTICS_ENGINE
+    analyze_data = None
+    if domain in cube.DOMAINS:
+        if engine == "numpy" and range in facts.MEASURES:
+            analyze_data = columnar.analyze
+        elif engine == "cube" and range in cube.MEASURES and approximate:
+            analyze_data = cube.analyze
+    if analyze_data:
+        data = analyze_data(
+            domain, range, [value], department=dept, division=div, category=cat
+        )
+        data.sort(key=lambda d: d[f"{range}_{value}"], reverse=True)
+        data = data[:limit]
+    else:
+        if domain in cube.DOMAINS and range in facts.MEASURES:
+            queryset = models.WorkOrderFact.objects.all()
+            field = facts.fact_field(domain)
+        else:
+            queryset = models.WorkOrder.objects.all()
+            field = domain
+        if dept:
+            queryset = queryset.filter(department=dept)
+        if div:
+            queryset = queryset.filter(division=div)
+        if cat:
+            queryset = queryset.filter(category=cat)
+        data = list(
+            analyze(queryset, domain=field, range=range, stats=[value]).order_by(
+                f"-{range}_{value}"
+            )[:limit]
+        )
+        for d in data:
+            d[domain] = d[field]
     labels = [d[domain] for d in data]
     series = [d[f"{range}_{value}"] for d in data]
     colors = []
@@ -86,3 +110,142 @@ def chart_data(request):
         ],
     }
     return JsonResponse({"chart": {"data": data}})
+
+
+FILTERS = {
+    "department": models.Department,
+    "division": models.Division,
+    "category": models.Category,
+}
+
+
+def dashboard_filters(request):
+    return {
+        name: (
+            get_object_or_404(model, code=request.GET[name])
+            if request.GET.get(name)
+            else None
+        )
+        for name, model in FILTERS.items()
+    }
+
+
+@cache.cached_json
+def timeseries_data(request):
+    domain = request.GET.get("domain")
+    period = request.GET.get("period", "month")
+    measure = request.GET.get("range", "total_cost")
+    try:
+        limit = int(request.GET.get("limit", 5))
+    except ValueError:
+        return HttpResponseBadRequest()
+    if (
+        domain not in cube.DOMAINS
+        or period not in rollup.PERIODS
+        or measure not in rollup.MEASURES
+        or limit < 1
+    ):
+        return HttpResponseBadRequest()
+    data = rollup.timeseries(
+        period, domain, measure, limit, **dashboard_filters(request)
+    )
+    return JsonResponse({"timeseries": data})
+
+
+TOP_GROUPS = {
+    "month": TruncMonth("created"),
+    "week": TruncWeek("created"),
+    "department": "department_text",
+    "division": "division_text",
+    "category": "category_text",
+    "assigned_crew": "assigned_crew_text",
+}
+
+TOP_FIELDS = [
+    "project_code",
+    "created",
+    "total_cost",
+    "labor_hours",
+    "category_text",
+    "task_text",
+    "department_text",
+    "division_text",
+    "assigned_crew_text",
+]
+
+
+@cache.cached_json
+def top_orders(request):
+    group = request.GET.get("group", "month")
+    measure = request.GET.get("range", "total_cost")
+    try:
+        n = int(request.GET.get("n", 5))
+    except ValueError:
+        return HttpResponseBadRequest()
+    if group not in TOP_GROUPS or measure not in cube.MEASURES or n < 1:
+        return HttpResponseBadRequest()
+    filters = {k: v for k, v in dashboard_filters(request).items() if v is not None}
+    orders = models.WorkOrderFact.objects.filter(**filters).values(*TOP_FIELDS)
+    rows = top_n_per_group(
+        orders, TOP_GROUPS[group], [f"-{measure}", "project_code"], n
+    )
+    groups = {}
+    for row in rows:
+        groups.setdefault(row.pop("group_0"), []).append(row)
+    return JsonResponse(
+        {"top": [{"group": g, "orders": orders} for g, orders in groups.items()]}
+    )
+
+
+CREW_PAGE_SIZE = 50
+
+
+def date_param(request, name):
+    """The YYYY-MM-DD date in the ``name`` parameter, or None when it's absent."""
+    value = request.GET.get(name)
+    if not value:
+        return None
+    day = parse_date(value)
+    if day is None:
+        raise ValueError(f"{name} must be a YYYY-MM-DD date")
+    return day
+
+
+@cache.cached_json
+def crew_data(request):
+    try:
+        start = date_param(request, "start")
+        end = date_param(request, "end")
+        page_size = min(int(request.GET.get("page_size", CREW_PAGE_SIZE)), 500)
+    except ValueError:
+        return HttpResponseBadRequest()
+    if page_size < 1:
+        return HttpResponseBadRequest()
+    months = productivity.crew_months(
+        crew=request.GET.get("crew"), start=start, end=end
+    )
+    page = Paginator(months, page_size).get_page(request.GET.get("page"))
+    results = []
+    for month in page:
+        month["cost_per_order"] = round(month["total_cost"] / month["orders"], 4)
+        results.append(month)
+    return JsonResponse(
+        {
+            "page": page.number,
+            "pages": page.paginator.num_pages,
+            "count": page.paginator.count,
+            "results": results,
+        }
+    )
+
+
+def filter_options(request):
+    selected = {
+        dimension: request.GET.get(dimension) or None
+        for dimension in facts.OPTION_DIMENSIONS
+    }
+    return JsonResponse(facts.cascade(facts.options(), **selected))
+
+
+def cache_stats(request):
+    return JsonResponse({"generation": cache.current_generation(), **cache.stats})
@@ -0,0 +1,14 @@
+"""
+Setup of the importer's worker processes. The workers import this module
+before Django is set up, so it mustn't import the models.
+"""
+
+import django
+from django.db import connections
+
+
+def setup(databases):
+    django.setup()
+    # Use the databases the parent uses, e.g. the test database.
+    for alias, name in databases.items():
+        connections[alias].settings_dict["NAME"] = name
@@ -132,4 +132,39 @@ STATICFILES_DIRS = (
     os.path.join(BASE_DIR, 'static'),
 )
 
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
\ No newline at end of file
+STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# Rendered chart_data responses. Set CHART_CACHE_BACKEND to e.g.
+# django.core.cache.backends.filebased.FileBasedCache with a directory as
+# CHART_CACHE_LOCATION to share the cache between workers.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'chart': {
+        'BACKEND': os.environ.get('CHART_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CHART_CACHE_LOCATION', 'chart'),
+        'TIMEOUT': int(os.environ.get('CHART_CACHE_TIMEOUT', 24 * 60 * 60)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('CHART_CACHE_MAX_ENTRIES', 5000)),
+        },
+    },
+}
+
+# Seconds a process trusts its copy of the import generation before reading
+# it from the database again.
+CHART_CACHE_GENERATION_TTL = float(os.environ.get('CHART_CACHE_GENERATION_TTL', 5))
+
+# "approximate" serves chart percentiles from the work order cube's
+# sketches, "exact" computes them with PERCENTILE_CONT on every request.
+PERCENTILE_MODE = os.environ.get('PERCENTILE_MODE', 'approximate')
+
+# What answers chart_data: "cube" reads the pre-aggregated cube, "numpy"
+# keeps the work order facts in memory as NumPy arrays (requires numpy) and
+# "sql" aggregates the facts in the database on every request.
+ANALYTICS_ENGINE = os.environ.get('ANALYTICS_ENGINE', 'cube')
+
+# Where imports write the JSON report of their time, queries and rows per
+# stage, unless import_data is given another path.
+IMPORT_PROFILE_REPORT = os.environ.get(
+    'IMPORT_PROFILE_REPORT', os.path.join(BASE_DIR, 'import-profile.json')
+)